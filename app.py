@@ -3,9 +3,15 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import sys
 import plotly.express as px
 import plotly.graph_objects as go
 
+# Share the backend's data layer (compact dtypes, Parquet copy) with the API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from dataset import load_dataset
+from scoring import ModelScorer
+
 # ---------------------------------------------------------
 # 1. PAGE CONFIG & STYLING
 # ---------------------------------------------------------
@@ -125,7 +131,7 @@ def load_assets():
     csv_path = os.path.join(model_dir, "WA_Fn-UseC_-HR-Employee-Attrition.csv")
     if os.path.exists(csv_path):
         try:
-            df = pd.read_csv(csv_path)
+            df, _ = load_dataset(csv_path)
             # Ensure EmployeeNumber exists
             if not df.empty and 'EmployeeNumber' not in df.columns:
                 df['EmployeeNumber'] = df.index + 1
@@ -139,52 +145,99 @@ models, feature_cols, df_full = load_assets()
 # ---------------------------------------------------------
 # 3. HELPER FUNCTIONS
 # ---------------------------------------------------------
-def prepare_input(data_dict, feature_cols):
-    df_input = pd.DataFrame([data_dict])
-    cat_cols = ['BusinessTravel', 'Department', 'EducationField', 'Gender', 'JobRole', 'MaritalStatus', 'OverTime']
-    
-    # Ensure all categorical columns exist
-    for col in cat_cols:
-        if col not in df_input.columns:
-            df_input[col] = "Unknown" # Or handle appropriately
+ENSEMBLE_CHOICE = "Ensemble (All Models)"
 
-    df_enc = pd.get_dummies(df_input, columns=cat_cols)
-    
-    # Align columns
-    if feature_cols:
-        for col in feature_cols:
-            if col not in df_enc.columns:
-                df_enc[col] = 0
-        return df_enc[feature_cols]
-    return df_enc # Fallback if feature_cols not loaded
+@st.cache_resource
+def load_scorer():
+    # Same encoder and ensemble averaging as the API (backend/scoring.py)
+    return ModelScorer(models, feature_cols)
+
+@st.cache_data(max_entries=2048, show_spinner=False)
+def cached_probability(model_name, payload):
+    # payload is the form as a sorted tuple of (field, value) pairs, so identical
+    # analyses hit the cache; errors raise and are therefore never cached
+    model_key = "ensemble" if model_name == ENSEMBLE_CHOICE else model_name
+    return load_scorer().predict_record(dict(payload), model_key)
 
 def predict(model_name, input_data):
     # Safety check
     if not feature_cols or not models:
         return 0.5 # Default probability if models missing
-        
-    X = prepare_input(input_data, feature_cols)
-    prob = 0.0
-    
-    if model_name == "Ensemble (All Models)":
-        probs = []
-        for m in models.values():
-            try:
-                if hasattr(m, "predict_proba"):
-                    probs.append(m.predict_proba(X)[0, 1])
-                else:
-                    # Fallback for models without predict_proba if any
-                    pass
-            except: pass
-        if probs:
-            prob = np.mean(probs)
-    elif model_name in models:
-        try:
-            prob = models[model_name].predict_proba(X)[0, 1]
-        except:
-            prob = 0.5 # Error fallback
-    
-    return prob
+    if model_name != ENSEMBLE_CHOICE and model_name not in models:
+        return 0.0
+
+    try:
+        return cached_probability(model_name, tuple(sorted(input_data.items())))
+    except Exception:
+        return 0.5 # Error fallback
+
+# Company Overview reads per Department x JobRole cells built once per dataset, so a
+# filter change only sums the selected cells instead of rescanning every employee.
+# Each cell also keeps a tenure x income grid of headcount and leavers for the
+# density chart, whose size doesn't depend on how many employees are shown.
+INCOME_BINS = 40
+
+@st.cache_resource
+def overview_cells(_data):
+    groups = _data.groupby(['Department', 'JobRole'], observed=True, sort=True)
+    codes = groups.ngroup().to_numpy()
+    cells = groups.size().reset_index(name='Employees')
+    valid = codes >= 0
+    codes = codes[valid]
+    rows = _data[valid]
+    n_cells = len(cells)
+
+    leaver = (rows['Attrition'] == 'Yes').to_numpy()
+    cells['Leavers'] = np.bincount(codes, weights=leaver, minlength=n_cells).astype(np.int64)
+    cells['SatisfactionSum'] = np.bincount(codes, weights=rows['JobSatisfaction'].to_numpy(dtype=np.float64), minlength=n_cells)
+    cells['IncomeSum'] = np.bincount(codes, weights=rows['MonthlyIncome'].to_numpy(dtype=np.float64), minlength=n_cells)
+
+    # One bin per year of tenure, INCOME_BINS equal-width income bins
+    tenure = rows['YearsAtCompany'].to_numpy(dtype=np.int64)
+    income = rows['MonthlyIncome'].to_numpy(dtype=np.float64)
+    tenure_edges = np.arange(0, tenure.max() + 2)
+    income_edges = np.linspace(income.min(), income.max(), INCOME_BINS + 1)
+    nx, ny = len(tenure_edges) - 1, INCOME_BINS
+    ix = np.clip(tenure, 0, nx - 1)
+    iy = np.clip(np.searchsorted(income_edges, income, side='right') - 1, 0, ny - 1)
+    flat = (codes * nx + ix) * ny + iy
+    totals = np.bincount(flat, minlength=n_cells * nx * ny).reshape(n_cells, nx, ny)
+    leavers = np.bincount(flat[leaver], minlength=n_cells * nx * ny).reshape(n_cells, nx, ny)
+    return {'cells': cells, 'totals': totals, 'leavers': leavers, 'tenure_edges': tenure_edges, 'income_edges': income_edges}
+
+def department_roles():
+    cells = overview_cells(df_full)['cells']
+    return {dept: sorted(group['JobRole']) for dept, group in cells.groupby('Department', observed=True)}
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def overview_aggregates(departments, roles):
+    # departments and roles are sorted tuples, which makes them the cache key
+    ov = overview_cells(df_full)
+    cells = ov['cells']
+    selected = (cells['Department'].isin(departments) & cells['JobRole'].isin(roles)).to_numpy()
+    picked = cells[selected]
+    total = int(picked['Employees'].sum())
+    leavers = int(picked['Leavers'].sum())
+
+    dept_counts = picked.groupby('Department', observed=True)['Leavers'].sum().reset_index()
+    dept_counts.columns = ['Department', 'Count']
+    dept_counts = dept_counts[dept_counts['Count'] > 0].sort_values('Count', ascending=False, kind='stable')
+    return {
+        'total': total,
+        'att_rate': leavers / total * 100 if total else 0.0,
+        'avg_sat': picked['SatisfactionSum'].sum() / total if total else 0.0,
+        'avg_inc': picked['IncomeSum'].sum() / total if total else 0.0,
+        'dept_counts': dept_counts,
+        'grid_totals': ov['totals'][selected].sum(axis=0),
+        'grid_leavers': ov['leavers'][selected].sum(axis=0),
+    }
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def scatter_sample(departments, roles, n=500):
+    # Fixed seed, so the sampled points stay put across reruns
+    mask = df_full['Department'].isin(departments) & df_full['JobRole'].isin(roles)
+    rows = df_full.loc[mask, ['YearsAtCompany', 'MonthlyIncome', 'Attrition', 'JobRole']]
+    return rows.sample(min(n, len(rows)), random_state=0)
 
 def get_risk_drivers(data, prob):
     drivers = []
@@ -215,9 +268,9 @@ with st.sidebar:
     if view_mode == "Employee Profile":
         st.subheader("Prediction Model")
         # Only show available models
-        avail_options = ["Ensemble (All Models)"]
+        avail_options = [ENSEMBLE_CHOICE]
         if models:
-            avail_options = list(models.keys()) + ["Ensemble (All Models)"]
+            avail_options = list(models.keys()) + [ENSEMBLE_CHOICE]
             
         model_choice = st.radio("Select Model", 
             avail_options,
@@ -229,16 +282,18 @@ with st.sidebar:
         
         # Cascading Filters - Safe check for empty df
         if not df_full.empty:
-            all_depts = sorted(df_full['Department'].dropna().unique())
+            roles_by_dept = department_roles()
+            all_depts = sorted(roles_by_dept)
             sel_depts = st.multiselect("Departments", all_depts, default=all_depts)
             
-            # Filter df first to get available roles
-            mask = df_full['Department'].isin(sel_depts)
-            avail_roles = sorted(df_full[mask]['JobRole'].dropna().unique())
+            # Roles available in the selected departments
+            avail_roles = sorted({r for d in sel_depts for r in roles_by_dept[d]})
             sel_roles = st.multiselect("Job Roles", avail_roles, default=avail_roles)
+            chart_mode = st.radio("Tenure vs Income", ["Density", "Sample (500)"], horizontal=True)
         else:
             sel_depts = []
             sel_roles = []
+            chart_mode = "Density"
             st.warning("Data not loaded.")
 
 # ---------------------------------------------------------
@@ -467,35 +522,19 @@ elif view_mode == "Company Overview":
     if df_full.empty:
         st.warning("Dataset not loaded. Please upload 'WA_Fn-UseC_-HR-Employee-Attrition.csv'.")
     else:
-        # Apply filters to df_full
-        filtered_df = df_full[
-            (df_full['Department'].isin(sel_depts)) &
-            (df_full['JobRole'].isin(sel_roles))
-        ]
+        # Aggregates for the selection, cached per (departments, roles)
+        depts_key, roles_key = tuple(sorted(sel_depts)), tuple(sorted(sel_roles))
+        overview = overview_aggregates(depts_key, roles_key)
         
         # 0. Empty State
-        if filtered_df.empty:
+        if overview['total'] == 0:
             st.warning("No data matches the selected filters.")
         else:
             # --- 1. KPI CARDS ---
-            total = len(filtered_df)
-            
-            # Safety checks for columns
-            if 'Attrition' in filtered_df.columns:
-                att_count = len(filtered_df[filtered_df['Attrition'] == 'Yes'])
-                att_rate = (att_count / total) * 100
-            else:
-                att_rate = 0.0
-                
-            if 'JobSatisfaction' in filtered_df.columns:
-                avg_sat = filtered_df['JobSatisfaction'].mean()
-            else:
-                avg_sat = 0.0
-                
-            if 'MonthlyIncome' in filtered_df.columns:
-                avg_inc_kpi = filtered_df['MonthlyIncome'].mean()
-            else:
-                avg_inc_kpi = 0.0
+            total = overview['total']
+            att_rate = overview['att_rate']
+            avg_sat = overview['avg_sat']
+            avg_inc_kpi = overview['avg_inc']
             
             # HTML Layout for cards
             kpi_html = f"""
@@ -529,26 +568,38 @@ elif view_mode == "Company Overview":
             
             with c1:
                 st.markdown("##### Attrition by Department")
-                if 'Attrition' in filtered_df.columns and 'Department' in filtered_df.columns:
-                    # Prepare data
-                    dept_counts = filtered_df[filtered_df['Attrition'] == 'Yes']['Department'].value_counts().reset_index()
-                    dept_counts.columns = ['Department', 'Count']
-                    
-                    if not dept_counts.empty:
-                        fig_bar = px.bar(dept_counts, x='Department', y='Count', color='Count', color_continuous_scale='Reds')
-                        fig_bar.update_layout(xaxis_title=None, yaxis_title=None, coloraxis_showscale=False, height=350, margin=dict(l=0,r=0,t=0,b=0), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-                        st.plotly_chart(fig_bar, use_container_width=True)
-                    else:
-                        st.success("No attrition in selected group.")
+                dept_counts = overview['dept_counts']
+                if not dept_counts.empty:
+                    fig_bar = px.bar(dept_counts, x='Department', y='Count', color='Count', color_continuous_scale='Reds')
+                    fig_bar.update_layout(xaxis_title=None, yaxis_title=None, coloraxis_showscale=False, height=350, margin=dict(l=0,r=0,t=0,b=0), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+                    st.plotly_chart(fig_bar, use_container_width=True)
                 else:
-                    st.warning("Missing required columns for chart.")
+                    st.success("No attrition in selected group.")
                     
             with c2:
                 st.markdown("##### Flight Risk: Tenure vs Income")
-                if 'YearsAtCompany' in filtered_df.columns and 'MonthlyIncome' in filtered_df.columns and 'Attrition' in filtered_df.columns:
-                    # Simple Scatter: No bubble size, clear colors
-                    # Limit points for performance if dataset large
-                    scatter_data = filtered_df.sample(min(500, len(filtered_df)))
+                if chart_mode == "Density":
+                    # Every employee in the selection, binned: colour is the attrition rate of
+                    # the bin, hover shows its headcount
+                    ov = overview_cells(df_full)
+                    counts, leavers = overview['grid_totals'], overview['grid_leavers']
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        rate = np.where(counts > 0, leavers / counts * 100, np.nan)
+                    tenure_centers = ov['tenure_edges'][:-1]
+                    income_centers = (ov['income_edges'][:-1] + ov['income_edges'][1:]) / 2
+                    fig_scat = go.Figure(go.Heatmap(
+                        x=tenure_centers,
+                        y=income_centers,
+                        z=rate.T,
+                        customdata=np.dstack([counts.T, leavers.T]),
+                        colorscale=[[0, "#10b981"], [0.5, "#facc15"], [1, "#ef4444"]],
+                        zmin=0, zmax=100,
+                        colorbar=dict(title="Attrition %", thickness=10),
+                        hovertemplate="Tenure %{x} yrs<br>Income ~$%{y:,.0f}<br>%{customdata[0]} employees, %{customdata[1]} left<br>Attrition %{z:.1f}%<extra></extra>",
+                    ))
+                else:
+                    # Same 500 employees on every rerun for a given selection
+                    scatter_data = scatter_sample(depts_key, roles_key)
                     
                     fig_scat = px.scatter(
                         scatter_data, 
@@ -559,15 +610,13 @@ elif view_mode == "Company Overview":
                         opacity=0.6,
                         hover_data=["JobRole"]
                     )
-                    fig_scat.update_layout(
-                        xaxis_title="Tenure (Years)", 
-                        yaxis_title="Monthly Income", 
-                        height=350,
-                        margin=dict(l=0,r=0,t=0,b=0),
-                        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                        paper_bgcolor='rgba(0,0,0,0)', 
-                        plot_bgcolor='rgba(0,0,0,0)'
-                    )
-                    st.plotly_chart(fig_scat, use_container_width=True)
-                else:
-                    st.warning("Missing required columns for chart.")
\ No newline at end of file
+                fig_scat.update_layout(
+                    xaxis_title="Tenure (Years)", 
+                    yaxis_title="Monthly Income", 
+                    height=350,
+                    margin=dict(l=0,r=0,t=0,b=0),
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                    paper_bgcolor='rgba(0,0,0,0)', 
+                    plot_bgcolor='rgba(0,0,0,0)'
+                )
+                st.plotly_chart(fig_scat, use_container_width=True)
@@ -0,0 +1,113 @@
+import asyncio
+import sqlite3
+import time
+from contextlib import closing
+
+# --------------------------------------------------
+# CREDIT LEDGER
+# --------------------------------------------------
+# Daily LLM credits live in a small SQLite file next to the API, so every uvicorn
+# worker draws from the same bucket and restarts don't refill it. The bucket refills
+# at UTC midnight. Each spend is one BEGIN IMMEDIATE transaction, which takes the
+# database write lock, so check-and-increment is atomic across processes.
+# client_limit=None means no per-client quota.
+class CreditLedger:
+    def __init__(self, path: str, daily_limit: int, client_limit: int):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.client_limit = client_limit
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "day TEXT NOT NULL, client TEXT NOT NULL, used INTEGER NOT NULL, "
+                "PRIMARY KEY (day, client))"
+            )
+
+    def _connect(self):
+        # isolation_level=None so transactions are controlled explicitly
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    @staticmethod
+    def _today():
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def try_spend(self, client: str) -> bool:
+        # Takes one credit for `client` unless the day's budget or the client's quota is used up
+        day = self._today()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM usage WHERE day != ?", (day,))
+            total = conn.execute("SELECT COALESCE(SUM(used), 0) FROM usage WHERE day = ?", (day,)).fetchone()[0]
+            mine = conn.execute("SELECT COALESCE(SUM(used), 0) FROM usage WHERE day = ? AND client = ?", (day, client)).fetchone()[0]
+            if total >= self.daily_limit or (self.client_limit is not None and mine >= self.client_limit):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT INTO usage (day, client, used) VALUES (?, ?, 1) "
+                "ON CONFLICT (day, client) DO UPDATE SET used = used + 1",
+                (day, client),
+            )
+            conn.execute("COMMIT")
+            return True
+
+    def refund(self, client: str):
+        # Returns a credit whose upstream call failed
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE usage SET used = MAX(used - 1, 0) WHERE day = ? AND client = ?", (self._today(), client))
+
+    def used(self, client: str = None) -> int:
+        query, args = "SELECT COALESCE(SUM(used), 0) FROM usage WHERE day = ?", [self._today()]
+        if client is not None:
+            query += " AND client = ?"
+            args.append(client)
+        with closing(self._connect()) as conn:
+            return conn.execute(query, args).fetchone()[0]
+
+    def remaining(self) -> int:
+        return max(self.daily_limit - self.used(), 0)
+
+    def client_remaining(self, client: str) -> int:
+        return max(min(self.client_limit - self.used(client), self.remaining()), 0)
+
+# --------------------------------------------------
+# IN-FLIGHT LIMITER
+# --------------------------------------------------
+class Overloaded(Exception):
+    pass
+
+class InflightLimiter:
+    # At most `max_inflight` upstream calls run at once and `max_queue` more wait for
+    # a slot; anything beyond that is rejected immediately instead of piling up
+    def __init__(self, max_inflight: int, max_queue: int):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.admitted = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_inflight)
+
+    def admit(self):
+        if self.admitted >= self.max_inflight + self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{self.admitted} LLM calls already running or queued")
+        self.admitted += 1
+
+    def release(self):
+        self.admitted -= 1
+
+    async def run(self, coro):
+        # Runs an admitted call once a slot frees up
+        try:
+            async with self._slots:
+                return await coro
+        finally:
+            self.release()
+
+    def stats(self):
+        running = min(self.admitted, self.max_inflight)
+        return {
+            "running": running,
+            "queued": self.admitted - running,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sharding import SHARD_ROWS
+
+# --------------------------------------------------
+# SCENARIOS
+# --------------------------------------------------
+# Every dataset size runs in its own process, with a working directory holding a
+# synthetic extract of that size and links to the model artifacts, because
+# main.py loads everything relative to the working directory at import time.
+# Requests go through the ASGI app in-process (no sockets): first one at a time
+# for latency, then many at once for throughput. The LLM endpoint uses the fake
+# provider, so no Gemini credits are spent.
+MODEL_NAMES = ["random_forest", "gradient_boosting", "logistic_regression", "ensemble"]
+DEPARTMENTS = ["Research & Development", "Sales", "Human Resources"]
+
+def _filters(rng, roles):
+    departments = [d for d in DEPARTMENTS if rng.random() < 0.5]
+    job_roles = [r for r in roles if rng.random() < 0.3]
+    return departments, job_roles
+
+def build_requests(ctx, rng, n):
+    # endpoint -> list of (method, path, json body); `share` scales the request count
+    # for endpoints whose responses grow with the dataset
+    ids, roles, drivers = ctx["ids"], ctx["roles"], ctx["drivers"]
+    scenarios = {}
+
+    def add(name, share, make):
+        scenarios[name] = [make() for _ in range(max(int(n * share), 1))]
+
+    def stats():
+        departments, job_roles = _filters(rng, roles)
+        return "POST", "/stats", {"departments": departments, "job_roles": job_roles}
+
+    def predict():
+        what_if = {"OverTime": str(rng.choice(["Yes", "No"])), "MonthlyIncome": int(rng.integers(1000, 20000))}
+        return "POST", "/predict", {"employee_id": int(rng.choice(ids)), "model_name": str(rng.choice(MODEL_NAMES)), "what_if": what_if}
+
+    def top_risk():
+        departments, job_roles = _filters(rng, roles)
+        return "GET", f"/top_risk_employees?model_name={rng.choice(MODEL_NAMES)}&departments={','.join(departments)}&job_roles={','.join(job_roles)}", None
+
+    def employee():
+        return "GET", f"/employee/{int(rng.choice(ids))}", None
+
+    def recommendations():
+        level, key_drivers = drivers[int(rng.integers(len(drivers)))]
+        return "POST", "/generate_recommendations", {"employee_id": int(rng.choice(ids)), "risk_probability": 50.0, "risk_level": level, "key_drivers": key_drivers}
+
+    add("stats", 1, stats)
+    add("predict", 1, predict)
+    add("top_risk_employees", 1, top_risk)
+    add("employees", 0.05, lambda: ("GET", "/employees", None))
+    add("employee", 1, employee)
+    add("generate_recommendations", 1, recommendations)
+    return scenarios
+
+def summarize(latencies, elapsed, errors):
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(ms), "errors": errors,
+        "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else 0.0,
+    }
+
+async def drive(client, requests, concurrency):
+    latencies, errors = [], 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(method, path, body):
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(*request) for request in requests])
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+def scoring_throughput(engine, worker_counts, shard_rows):
+    # Whole-extract scoring with every model, in-process (0 workers) and on a sharded
+    # pool of each size; pool startup is not timed
+    from scoring import ScoringEngine
+    from sharding import ShardedScorer
+
+    results = {}
+    for workers in worker_counts:
+        sharded = ShardedScorer(engine.models, engine.encoder.feature_columns, workers, shard_rows, min_rows=0) if workers else None
+        try:
+            if sharded is not None:
+                sharded.start()
+            fresh = ScoringEngine(engine.data, engine.models, engine.encoder.feature_columns, X=engine.X, sharded=sharded)
+            start = time.perf_counter()
+            fresh.score_models(list(engine.models))
+            elapsed = time.perf_counter() - start
+        finally:
+            if sharded is not None:
+                sharded.close()
+        results[str(workers)] = {"seconds": round(elapsed, 3), "rows_per_s": round(len(engine.X) / elapsed, 1)}
+    if "0" in results:
+        for result in results.values():
+            result["speedup"] = round(results["0"]["seconds"] / result["seconds"], 2)
+    return results
+
+# --------------------------------------------------
+# WORKER (one dataset size)
+# --------------------------------------------------
+def run_worker(n_requests, concurrency, seed, llm_delay, scoring_workers, shard_rows):
+    import resource
+    import httpx
+
+    start = time.perf_counter()
+    import main
+    startup_s = time.perf_counter() - start
+    main.recommendation_service.provider.delay = llm_delay
+
+    data = main.state.df
+    drivers = []
+    for pos in range(min(len(data), 50)):
+        level = main.risk_level(main.state.engine.scores("random_forest")[pos])
+        drivers.append((level, main.key_drivers([data.iloc[pos]], [{}], main.state.driver_ecdf)[0]))
+    ctx = {"ids": data["EmployeeNumber"].to_numpy(), "roles": sorted(data["JobRole"].unique()), "drivers": drivers}
+    rng = np.random.default_rng(seed)
+    scenarios = build_requests(ctx, rng, n_requests)
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = {}
+            for name, requests in scenarios.items():
+                results[name] = {
+                    "sequential": await drive(client, requests, 1),
+                    "concurrent": await drive(client, requests, concurrency),
+                }
+            return results
+
+    endpoints = asyncio.run(run())
+    # ru_maxrss is in kB on Linux; taken before the scoring pools, which live in other processes
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    scoring = scoring_throughput(main.state.engine, scoring_workers, shard_rows)
+    return {"rows": len(data), "startup_s": round(startup_s, 3), "peak_rss_mb": round(peak_mb, 1), "endpoints": endpoints, "scoring": scoring}
+
+def run_size(rows, args, backend_dir):
+    # Builds a working directory for one dataset size and runs the worker in it
+    from evaluation import ARTIFACT_FILES
+    from synthetic import WorkforceModel, write_dataset
+    import pandas as pd
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{rows}_")
+    for name in ARTIFACT_FILES:
+        os.symlink(os.path.join(backend_dir, name), os.path.join(workdir, name))
+    source = pd.read_csv(args.source)
+    write_dataset(WorkforceModel(source), os.path.join(workdir, os.path.basename(args.source)), rows, args.seed)
+
+    env = {**os.environ, "LLM_PROVIDER": "fake", "CREDITS_DB": os.path.join(workdir, "credits.db"),
+           "CLIENT_DAILY_LIMIT": str(10 ** 9), "PREFETCH_TOP_N": "0", "DATA_WATCH_INTERVAL": "0"}
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--requests", str(args.requests),
+           "--concurrency", str(args.concurrency), "--seed", str(args.seed), "--llm-delay", str(args.llm_delay),
+           "--scoring-workers", args.scoring_workers, "--shard-rows", str(args.shard_rows)]
+    try:
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark worker for {rows} rows failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# --------------------------------------------------
+# REGRESSION CHECK
+# --------------------------------------------------
+def find_regressions(baseline, current, threshold, min_ms):
+    # Latency regresses when it grows by more than `threshold` (and min_ms), throughput
+    # when it drops by more than `threshold`, memory when it grows by more than `threshold`
+    regressions = []
+    for size, result in current["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{size} rows: peak_rss_mb {base['peak_rss_mb']} -> {result['peak_rss_mb']}")
+        for endpoint, modes in result["endpoints"].items():
+            for mode, stats in modes.items():
+                old = base["endpoints"].get(endpoint, {}).get(mode)
+                if old is None:
+                    continue
+                for key in ("p50_ms", "p95_ms", "p99_ms"):
+                    if stats[key] > old[key] * (1 + threshold) and stats[key] - old[key] > min_ms:
+                        regressions.append(f"{size} rows {endpoint} {mode}: {key} {old[key]} -> {stats[key]}")
+                if stats["throughput_rps"] < old["throughput_rps"] / (1 + threshold):
+                    regressions.append(f"{size} rows {endpoint} {mode}: throughput_rps {old['throughput_rps']} -> {stats['throughput_rps']}")
+        for workers, stats in result.get("scoring", {}).items():
+            old = base.get("scoring", {}).get(workers)
+            if old is not None and stats["rows_per_s"] < old["rows_per_s"] / (1 + threshold):
+                regressions.append(f"{size} rows scoring with {workers} workers: rows_per_s {old['rows_per_s']} -> {stats['rows_per_s']}")
+    return regressions
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python benchmark.py --sizes 10000,100000 --out bench.json
+    #   python benchmark.py --sizes 10000,100000 --baseline bench.json --threshold 0.25
+    parser = argparse.ArgumentParser(description="Benchmark the API at several dataset sizes")
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated row counts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--source", default="WA_Fn-UseC_-HR-Employee-Attrition.csv")
+    parser.add_argument("--out", help="write results as JSON (use as the next baseline)")
+    parser.add_argument("--baseline", help="fail if results regress against this JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    parser.add_argument("--scoring-workers", default="0,2,4", help="comma-separated pool sizes for whole-extract scoring (0 = in-process)")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        scoring_workers = [int(w) for w in args.scoring_workers.split(",") if w]
+        print(json.dumps(run_worker(args.requests, args.concurrency, args.seed, args.llm_delay, scoring_workers, args.shard_rows)))
+        sys.exit(0)
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    args.source = os.path.abspath(args.source)
+    results = {
+        "config": {k: getattr(args, k) for k in ("requests", "concurrency", "seed", "llm_delay", "scoring_workers", "shard_rows")},
+        "sizes": {},
+    }
+    for rows in [int(s) for s in args.sizes.split(",")]:
+        results["sizes"][str(rows)] = result = run_size(rows, args, backend_dir)
+        print(f"{rows} rows: startup {result['startup_s']}s, peak {result['peak_rss_mb']} MB")
+        for endpoint, modes in result["endpoints"].items():
+            seq, conc = modes["sequential"], modes["concurrent"]
+            print(f"  {endpoint:<26} p50 {seq['p50_ms']:>9.2f} ms  p95 {seq['p95_ms']:>9.2f} ms  p99 {seq['p99_ms']:>9.2f} ms  "
+                  f"{conc['throughput_rps']:>8.1f} req/s @{args.concurrency}")
+        for workers, stats in result["scoring"].items():
+            print(f"  scoring, {workers:>2} workers          {stats['rows_per_s']:>12,.0f} rows/s  ({stats.get('speedup', 1.0)}x)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(json.load(f), results, args.threshold, args.min_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
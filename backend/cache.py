@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --------------------------------------------------
+# LRU CACHE
+# --------------------------------------------------
+class LRUCache:
+    # Bounded, thread-safe (sync endpoints run in a threadpool) and counts hits/misses
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+# --------------------------------------------------
+# TTL CACHE
+# --------------------------------------------------
+class TTLCache(LRUCache):
+    # LRUCache whose entries also expire `ttl` seconds after they were stored
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__(max_size)
+        self.ttl = ttl
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                # Undo the hit and drop the stale entry
+                self.hits -= 1
+                self.misses += 1
+                self._data.pop(key, None)
+            return None
+        return value
+
+    def put(self, key, value):
+        super().put(key, (value, time.monotonic() + self.ttl))
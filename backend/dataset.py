@@ -0,0 +1,135 @@
+import os
+
+import pandas as pd
+
+from evaluation import file_hash, replaced_atomically
+
+# --------------------------------------------------
+# COMPACT DATASET
+# --------------------------------------------------
+# The HR extract is converted once into Parquet, with low-cardinality strings
+# (Department, JobRole, OverTime, ...) stored as categoricals and every integer
+# column downcast to the smallest type that holds it. Loads then read only the
+# columns the caller uses. Without pyarrow the CSV is read into the same compact
+# dtypes, so both paths give identical frames. The Parquet file records the content
+# hash of the CSV it was built from; a copy built from anything else is rebuilt.
+CATEGORY_MAX_RATIO = 0.5
+SOURCE_HASH_KEY = b"source_csv_sha256"
+
+# Columns the API needs besides the model inputs
+API_EXTRA_COLUMNS = ["EmployeeNumber", "Attrition"]
+
+def api_columns(feature_columns) -> list:
+    from scoring import FeatureEncoder
+    return API_EXTRA_COLUMNS + [c for c in FeatureEncoder(feature_columns).source_columns if c not in API_EXTRA_COLUMNS]
+
+def parquet_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def has_parquet() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def compact(data: pd.DataFrame) -> pd.DataFrame:
+    # Floats are left alone: float32 would change model inputs and scores
+    columns = {}
+    for col in data.columns:
+        values = data[col]
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            if values.nunique(dropna=True) <= max(len(values) * CATEGORY_MAX_RATIO, 1):
+                values = values.astype("category")
+        columns[col] = values
+    return pd.DataFrame(columns, index=data.index)
+
+def convert_dataset(csv_path: str, out_path: str = None, csv_hash: str = None) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out_path = out_path or parquet_path(csv_path)
+    csv_hash = csv_hash or file_hash([csv_path])
+    table = pa.Table.from_pandas(compact(pd.read_csv(csv_path)), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_HASH_KEY: csv_hash.encode()})
+    with replaced_atomically(out_path) as tmp_path:
+        pq.write_table(table, tmp_path)
+    return out_path
+
+def source_hash(path: str):
+    # Hash of the CSV a Parquet copy was built from, or None
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(path):
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except Exception:
+        # Unreadable (e.g. truncated); treated as stale and rebuilt
+        return None
+    value = metadata.get(SOURCE_HASH_KEY)
+    return value.decode() if value else None
+
+def _load_parquet(csv_path: str, columns, csv_hash: str) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    path = parquet_path(csv_path)
+    if source_hash(path) != csv_hash:
+        convert_dataset(csv_path, path, csv_hash)
+    available = set(pq.read_schema(path).names)
+    projection = None if columns is None else [c for c in columns if c in available]
+    return pd.read_parquet(path, columns=projection)
+
+def load_dataset(csv_path: str, columns=None, csv_hash: str = None):
+    # Returns (frame, source). Columns missing from the file are skipped; the rest
+    # come back in the order given. The Parquet copy is (re)built when the CSV's
+    # content changed; pass `csv_hash` when the caller has already hashed the CSV.
+    if has_parquet():
+        try:
+            return _load_parquet(csv_path, columns, csv_hash or file_hash([csv_path])), "parquet"
+        except Exception as e:
+            print(f"Parquet copy unavailable, reading CSV: {e}")
+
+    wanted = None if columns is None else set(columns)
+    data = compact(pd.read_csv(csv_path, usecols=None if wanted is None else lambda c: c in wanted))
+    if columns is not None:
+        data = data[[c for c in columns if c in data.columns]]
+    return data, "csv"
+
+def frame_memory_mb(data: pd.DataFrame) -> float:
+    return round(data.memory_usage(deep=True).sum() / 2**20, 2)
+
+def memory_report(csv_path: str, columns=None) -> dict:
+    # Footprint of the plain pd.read_csv frame against the compact, projected one
+    plain = pd.read_csv(csv_path)
+    report = {"rows": len(plain), "csv_mb": frame_memory_mb(plain)}
+    del plain
+    data, source = load_dataset(csv_path, columns)
+    report.update({"source": source, "columns": data.shape[1], "compact_mb": frame_memory_mb(data)})
+    report["csv_file_mb"] = round(os.path.getsize(csv_path) / 2**20, 2)
+    if source == "parquet":
+        report["parquet_file_mb"] = round(os.path.getsize(parquet_path(csv_path)) / 2**20, 2)
+    return report
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/ whenever the extract changes:  python dataset.py [path/to/dataset.csv]
+    import json
+    import sys
+
+    import joblib
+    from evaluation import FEATURE_COLUMNS_FILE
+
+    data_path = sys.argv[1] if len(sys.argv) > 1 else "WA_Fn-UseC_-HR-Employee-Attrition.csv"
+    if has_parquet():
+        print(f"Wrote {convert_dataset(data_path)}")
+    else:
+        print("pyarrow is not installed; the API will read the CSV into compact dtypes")
+    print(json.dumps({
+        "all_columns": memory_report(data_path),
+        "api_columns": memory_report(data_path, api_columns(joblib.load(FEATURE_COLUMNS_FILE))),
+    }, indent=2))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# KEY DRIVERS
+# --------------------------------------------------
+# (factor, feature, default when missing, impact rule)
+DRIVERS = [
+    ("Overtime", "OverTime", "No", lambda v: "High" if v == "Yes" else "Low"),
+    ("Job Satisfaction", "JobSatisfaction", 3, lambda v: "High" if v == 1 else "Medium" if v == 2 else "Low"),
+    ("Work-Life Balance", "WorkLifeBalance", 3, lambda v: "High" if v == 1 else "Medium" if v == 2 else "Low"),
+    ("Monthly Income", "MonthlyIncome", 5000, lambda v: "High" if v < 4000 else "Low"),
+    ("Years at Company", "YearsAtCompany", 5, lambda v: "High" if v > 10 else "Low"),
+    ("Years with Manager", "YearsWithCurrManager", 3, lambda v: "High" if v < 2 else "Low"),
+    ("Recent Promotion", "YearsSinceLastPromotion", 2, lambda v: "High" if v > 5 else "Low"),
+]
+
+# Low values drive risk here, so the contribution is the share of employees above the value
+INVERTED = {"JobSatisfaction", "WorkLifeBalance", "MonthlyIncome", "YearsWithCurrManager"}
+
+OVERTIME_CODES = {"No": 0, "Yes": 1}
+
+class DriverECDF:
+    # Sorted column per driver feature; the share of employees at or below a value
+    # is a binary search instead of a full-column comparison
+    def __init__(self, data: pd.DataFrame):
+        self.n = len(data)
+        self.sorted = {}
+        for _, feature, _, _ in DRIVERS:
+            values = data[feature].map(OVERTIME_CODES) if feature == "OverTime" else data[feature]
+            # NaN sorts last, so it never counts as "at or below" but still counts in n
+            self.sorted[feature] = np.sort(values.to_numpy(dtype=np.float64))
+
+    def percentiles(self, feature: str, values) -> np.ndarray:
+        values = np.asarray(values, dtype=object)
+        if feature == "OverTime":
+            values = values == "Yes"
+        below = np.searchsorted(self.sorted[feature], values.astype(np.float64), side="right")
+        return below / self.n * 100
+
+    def contributions(self, feature: str, values) -> np.ndarray:
+        percentile = self.percentiles(feature, values)
+        if feature in INVERTED:
+            percentile = 100 - percentile
+        return np.round(percentile, 1)
+
+def key_drivers(rows: list, what_ifs: list, ecdf: DriverECDF) -> list:
+    # Key drivers for many (employee row, what-if) pairs, one vectorized lookup per driver
+    drivers = [[] for _ in rows]
+    for factor, feature, default, impact in DRIVERS:
+        values = []
+        for row, what_if in zip(rows, what_ifs):
+            if feature in what_if and feature in row:
+                values.append(what_if[feature])
+            else:
+                values.append(row.get(feature, default))
+        contributions = ecdf.contributions(feature, values)
+        for out, value, contribution in zip(drivers, values, contributions):
+            out.append({"factor": factor, "impact": impact(value), "contribution": float(contribution)})
+    return drivers
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# MODEL METRICS
+# --------------------------------------------------
+# Evaluation metrics are stored next to the joblib artifacts, tagged with a hash of
+# the artifacts and the dataset they were computed on. The API only recomputes them
+# (which scores the whole dataset with every model) when either has changed.
+METRICS_FILE = "model_metrics.json"
+MODEL_FILES = {
+    "logistic_regression": "model_logreg_best.joblib",
+    "random_forest": "model_rf_best.joblib",
+    "gradient_boosting": "model_gb_best.joblib",
+}
+FEATURE_COLUMNS_FILE = "model_feature_columns.joblib"
+ARTIFACT_FILES = list(MODEL_FILES.values()) + [FEATURE_COLUMNS_FILE]
+
+# --------------------------------------------------
+# VERSIONED ARTIFACTS
+# --------------------------------------------------
+# `python train.py` writes each artifact set to its own version directory with a
+# manifest (feature columns, parameters, holdout metrics, data hash). A model
+# directory is either one version or the directory holding them (newest wins).
+TRAINING_MANIFEST = "manifest.json"
+
+def resolve_model_dir(path: str) -> str:
+    if not path or os.path.exists(os.path.join(path, TRAINING_MANIFEST)):
+        return path
+    # train.write_version fills "<version>.tmp" and renames it when complete
+    versions = sorted(
+        name for name in os.listdir(path)
+        if not name.endswith(".tmp") and os.path.exists(os.path.join(path, name, TRAINING_MANIFEST))
+    )
+    if not versions:
+        raise FileNotFoundError(f"No trained versions in {path}")
+    return os.path.join(path, versions[-1])
+
+def load_training_manifest(model_dir: str):
+    path = os.path.join(model_dir, TRAINING_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def artifact_paths(model_dir: str = "") -> list:
+    return [os.path.join(model_dir, name) for name in ARTIFACT_FILES]
+
+def file_hash(paths) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+@contextmanager
+def replaced_atomically(path: str, suffix: str = ""):
+    # Yields a temporary path to write instead of `path`, renamed over it once the
+    # block succeeds, so concurrent readers never see a partial file. `suffix` is for
+    # writers that append their own extension (np.savez adds .npz).
+    tmp_path = f"{path}.{os.getpid()}.tmp{suffix}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def compute_model_metrics(data: pd.DataFrame, engine, model_names) -> dict:
+    # Imported here so the API doesn't pay for sklearn.metrics when metrics are on disk
+    from sklearn.metrics import accuracy_score, recall_score, roc_auc_score
+
+    y = data["Attrition"].map({"Yes": 1, "No": 0})
+
+    # Scores every model in one batch, so a sharded engine runs them side by side
+    engine.score_models(list(model_names))
+    metrics = {}
+    for name in model_names:
+        y_pred_proba = engine.scores(name)
+        y_pred = (y_pred_proba > 0.5).astype(int)
+        accuracy = accuracy_score(y, y_pred)
+        recall = recall_score(y, y_pred, pos_label=1)
+        auc = roc_auc_score(y, y_pred_proba)
+        metrics[name] = {
+            "accuracy": round(accuracy, 2),
+            "recall": round(recall, 2),
+            "auc": round(auc, 2)
+        }
+    ensemble_acc = np.mean([metrics[m]["accuracy"] for m in metrics])
+    ensemble_recall = np.mean([metrics[m]["recall"] for m in metrics])
+    ensemble_auc = np.mean([metrics[m]["auc"] for m in metrics])
+    metrics["ensemble"] = {
+        "accuracy": round(ensemble_acc, 2),
+        "recall": round(ensemble_recall, 2),
+        "auc": round(ensemble_auc, 2)
+    }
+    return metrics
+
+def load_model_metrics(model_dir: str, artifacts_hash: str, data_hash: str):
+    path = os.path.join(model_dir, METRICS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        stored = json.load(f)
+    if stored.get("artifacts_hash") != artifacts_hash or stored.get("data_hash") != data_hash:
+        return None
+    return stored["metrics"]
+
+def save_model_metrics(model_dir: str, artifacts_hash: str, data_hash: str, metrics: dict):
+    with replaced_atomically(os.path.join(model_dir, METRICS_FILE)) as tmp_path, open(tmp_path, "w") as f:
+        json.dump({"artifacts_hash": artifacts_hash, "data_hash": data_hash, "metrics": metrics}, f, indent=2, default=float)
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/ after retraining or changing the dataset, with the same
+    # MODEL_DIR as the API:  python evaluation.py [path/to/dataset.csv]
+    import sys
+    import joblib
+    from scoring import ScoringEngine
+
+    data_path = sys.argv[1] if len(sys.argv) > 1 else "WA_Fn-UseC_-HR-Employee-Attrition.csv"
+    model_dir = resolve_model_dir(os.getenv("MODEL_DIR", ""))
+    data = pd.read_csv(data_path)
+    models = {name: joblib.load(os.path.join(model_dir, path)) for name, path in MODEL_FILES.items()}
+    engine = ScoringEngine(data, models, joblib.load(os.path.join(model_dir, FEATURE_COLUMNS_FILE)))
+    metrics = compute_model_metrics(data, engine, models)
+    save_model_metrics(model_dir, file_hash(artifact_paths(model_dir)), file_hash([data_path]), metrics)
+    print(json.dumps(metrics, indent=2, default=float))
@@ -0,0 +1,150 @@
+import numpy as np
+
+from model_store import ArrayModel, flatten_model, tree_input
+
+# --------------------------------------------------
+# COMPILED TREES
+# --------------------------------------------------
+# Every tree is padded to a complete binary tree of the ensemble's max depth, so a
+# row is scored in exactly `depth` vectorized steps across all trees at once, with
+# no leaf checks and none of sklearn's per-call validation. A leaf above the max
+# depth becomes a chain of always-left nodes ending in its value. Only the tree walk
+# differs from ArrayModel; chunking and combining leaves into probabilities are shared.
+MAX_COMPILED_DEPTH = 12
+PARITY_TOLERANCE = 1e-9
+
+class CompiledModel(ArrayModel):
+    def __init__(self, kind: str, params: dict, arrays: dict):
+        super().__init__(kind, params, arrays)
+        if kind == "linear":
+            return
+        left, right = np.asarray(arrays["left"]), np.asarray(arrays["right"])
+        feature, threshold = np.asarray(arrays["feature"]), np.asarray(arrays["threshold"])
+        value, roots = np.asarray(arrays["value"]), np.asarray(arrays["roots"])
+
+        depth = self._depth(left, right, roots)
+        if depth > MAX_COMPILED_DEPTH:
+            raise ValueError(f"Tree depth {depth} is too deep to compile")
+        self.depth = depth
+        n_internal, n_leaves = 2 ** depth - 1, 2 ** depth
+        self.feature = np.zeros((len(roots), max(n_internal, 1)), dtype=np.intp)
+        self.threshold = np.full((len(roots), max(n_internal, 1)), np.inf)
+        self.leaf_value = np.zeros((len(roots), n_leaves))
+        for t, root in enumerate(roots):
+            stack = [(int(root), 0, 0)]  # (node, slot in complete tree, level)
+            while stack:
+                node, slot, level = stack.pop()
+                if left[node] == -1:
+                    # Walk always-left down to the bottom level
+                    while level < depth:
+                        slot, level = 2 * slot + 1, level + 1
+                    self.leaf_value[t, slot - n_internal] = value[node]
+                    continue
+                self.feature[t, slot] = feature[node]
+                self.threshold[t, slot] = threshold[node]
+                stack.append((int(left[node]), 2 * slot + 1, level + 1))
+                stack.append((int(right[node]), 2 * slot + 2, level + 1))
+        self._trees = np.arange(len(roots))
+
+    @staticmethod
+    def _depth(left, right, roots):
+        depth = 0
+        frontier = np.asarray(roots, dtype=np.intp)
+        while True:
+            frontier = frontier[left[frontier] != -1]
+            if not len(frontier):
+                return depth
+            depth += 1
+            frontier = np.concatenate([left[frontier], right[frontier]])
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        X = tree_input(X)
+        rows = np.arange(len(X))[:, np.newaxis]
+        slot = np.zeros((len(X), len(self._trees)), dtype=np.intp)
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[self._trees, slot]] > self.threshold[self._trees, slot]
+            slot = 2 * slot + 1 + go_right
+        return self.leaf_value[self._trees, slot - (2 ** self.depth - 1)]
+
+def compile_model(model) -> CompiledModel:
+    if isinstance(model, ArrayModel):
+        return CompiledModel(model.kind, model.params, model.arrays)
+    return CompiledModel(*flatten_model(model))
+
+# --------------------------------------------------
+# BACKEND SELECTION
+# --------------------------------------------------
+def parse_backends(spec: str) -> dict:
+    # "random_forest=compiled,gradient_boosting=compiled" -> {name: backend}
+    backends = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, backend = part.split("=", 1)
+            backends[name.strip()] = backend.strip()
+    return backends
+
+def check_parity(reference, candidate, X: np.ndarray, feature_columns) -> float:
+    # Largest absolute difference in positive-class probability over X
+    import pandas as pd
+    frame = pd.DataFrame(X, columns=list(feature_columns))
+    expected = reference.predict_proba(X if getattr(reference, "takes_arrays", False) else frame)[:, 1]
+    return float(np.abs(candidate.predict_proba(X)[:, 1] - expected).max()) if len(X) else 0.0
+
+def select_backends(models: dict, backends: dict, sample: np.ndarray, feature_columns):
+    # Swaps in compiled models where requested, keeping the original if it fails to
+    # compile or its probabilities on `sample` drift past PARITY_TOLERANCE.
+    selected, report = dict(models), {}
+    for name, model in models.items():
+        backend = backends.get(name, "default")
+        report[name] = {"backend": "default"}
+        if backend != "compiled":
+            continue
+        try:
+            compiled = compile_model(model)
+        except ValueError as e:
+            print(f"Inference backend for {name} not compiled: {e}")
+            continue
+        diff = check_parity(model, compiled, sample, feature_columns)
+        if diff > PARITY_TOLERANCE:
+            print(f"Inference backend for {name} not compiled: parity diff {diff:.2e}")
+            continue
+        selected[name] = compiled
+        report[name] = {"backend": "compiled", "parity_max_abs_diff": diff}
+    return selected, report
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Parity and single-row latency check, run from backend/:
+    #   python inference.py [path/to/dataset.csv]
+    import sys
+    import time
+    import joblib
+    import pandas as pd
+    from evaluation import MODEL_FILES, FEATURE_COLUMNS_FILE
+    from scoring import FeatureEncoder
+
+    data_path = sys.argv[1] if len(sys.argv) > 1 else "WA_Fn-UseC_-HR-Employee-Attrition.csv"
+    feature_columns = list(joblib.load(FEATURE_COLUMNS_FILE))
+    X = FeatureEncoder(feature_columns).encode_frame(pd.read_csv(data_path))
+    # Perturbed copies exercise thresholds the real rows never straddle
+    X_all = np.vstack([X, X + np.random.default_rng(0).normal(0, 2, X.shape)])
+
+    failed = False
+    for name, path in MODEL_FILES.items():
+        model = joblib.load(path)
+        compiled = compile_model(model)
+        diff = check_parity(model, compiled, X_all, feature_columns)
+        failed |= diff > PARITY_TOLERANCE
+
+        row = X[:1]
+        frame = pd.DataFrame(row, columns=feature_columns)
+        timings = {}
+        for label, fn in [("sklearn", lambda: model.predict_proba(frame)), ("compiled", lambda: compiled.predict_proba(row))]:
+            start = time.perf_counter()
+            for _ in range(50):
+                fn()
+            timings[label] = (time.perf_counter() - start) / 50 * 1000
+        print(f"{name}: max |diff| {diff:.2e}, single row {timings['sklearn']:.3f} ms -> {timings['compiled']:.3f} ms")
+    sys.exit(1 if failed else 0)
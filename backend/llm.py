@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import time
+
+from cache import TTLCache
+from admission import InflightLimiter
+
+# --------------------------------------------------
+# PROVIDERS
+# --------------------------------------------------
+class GeminiProvider:
+    # The client (and the google-genai import) is created on first use.
+    # It automatically finds GEMINI_API_KEY from the environment.
+    model = "gemini-2.5-flash"
+
+    def __init__(self):
+        self._client = None
+
+    async def generate(self, prompt: str) -> list:
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+        response = await self._client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config={"response_mime_type": "application/json"}
+        )
+        return json.loads(response.text)
+
+class FakeProvider:
+    # Deterministic local stand-in for tests and demos; no network, no API key
+    model = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> list:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        drivers = json.loads(prompt[prompt.index("["):prompt.index("]") + 1])
+        high = [d["factor"] for d in drivers if d["impact"] == "High"] or ["overall engagement"]
+        return [f"Schedule a 1:1 to discuss {factor.lower()}." for factor in high[:4]]
+
+PROVIDERS = {"gemini": GeminiProvider, "fake": FakeProvider}
+
+# --------------------------------------------------
+# RECOMMENDATION SERVICE
+# --------------------------------------------------
+# Recommendations depend only on the risk level and the impact of each key driver, so
+# employees sharing that signature share one cached answer. Concurrent requests for a
+# signature that is already being generated wait on the same upstream call.
+def driver_signature(risk_level: str, key_drivers: list) -> tuple:
+    pairs = sorted((str(d.get("factor")), str(d.get("impact"))) for d in key_drivers if isinstance(d, dict))
+    return (risk_level, tuple(pairs))
+
+def build_prompt(signature: tuple) -> str:
+    risk_level, pairs = signature
+    drivers = [{"factor": factor, "impact": impact} for factor, impact in pairs]
+    return f"""
+    You are an HR Analytics expert. An employee has an attrition Risk Level of {risk_level}.
+
+    Here are the specific risk drivers and their impact levels calculated by our ML model:
+    {json.dumps(drivers)}
+
+    Based on these specific drivers and the overall risk level, provide 3 to 4 short, highly actionable recommendations for the manager to retain this employee.
+    Respond STRICTLY with a valid JSON array of strings. Example: ["Recommendation 1", "Recommendation 2"]
+    """
+
+class RecommendationService:
+    def __init__(self, provider, cache_size: int = 1024, ttl: float = 24 * 3600, max_inflight: int = 4, max_queue: int = 16):
+        self.provider = provider
+        self.cache = TTLCache(cache_size, ttl)
+        self.limiter = InflightLimiter(max_inflight, max_queue)
+        self._inflight = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        # Optional observer(provider, seconds, failed) called after every upstream call
+        self.observer = None
+
+    async def recommend(self, signature: tuple, spend=None, refund=None):
+        # Returns (recommendations, called_upstream), or (None, False) when the answer
+        # isn't cached and `await spend()` declines to pay for an upstream call;
+        # `await refund()` runs if that paid call fails. Raises Overloaded when the upstream queue
+        # is full. Upstream errors propagate to every waiter and are not cached.
+        recommendations = self.cache.get(signature)
+        if recommendations is not None:
+            return recommendations, False
+        task = self._inflight.get(signature)
+        if task is not None:
+            self.coalesced += 1
+            recommendations = await asyncio.shield(task)
+            if recommendations is None:
+                # The call joined here wasn't paid for; try paying for our own
+                return await self.recommend(signature, spend, refund)
+            return recommendations, False
+        self.limiter.admit()
+        # Shielded so a client disconnecting doesn't cancel the call for other waiters
+        task = asyncio.ensure_future(self._paid_generate(signature, spend, refund))
+        self._inflight[signature] = task
+        recommendations = await asyncio.shield(task)
+        return recommendations, recommendations is not None
+
+    async def _paid_generate(self, signature: tuple, spend=None, refund=None):
+        # Paying happens inside the in-flight task, so identical requests arriving
+        # while the ledger is consulted join this call instead of paying for their own
+        paid = False
+        try:
+            paid = spend is None or await spend()
+        finally:
+            if not paid:
+                self._inflight.pop(signature, None)
+                self.limiter.release()
+        if not paid:
+            return None
+        return await self.limiter.run(self._generate(signature, refund))
+
+    async def _generate(self, signature: tuple, refund=None):
+        start = time.perf_counter()
+        failed = True
+        try:
+            self.upstream_calls += 1
+            recommendations = await self.provider.generate(build_prompt(signature))
+            self.cache.put(signature, recommendations)
+            failed = False
+            return recommendations
+        except Exception:
+            if refund is not None:
+                await refund()
+            raise
+        finally:
+            self._inflight.pop(signature, None)
+            if self.observer is not None:
+                self.observer(self.provider.model, time.perf_counter() - start, failed)
+
+    def stats(self):
+        return {
+            "provider": self.provider.model,
+            "cache": self.cache.stats(),
+            "inflight": len(self._inflight),
+            "admission": self.limiter.stats(),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+        }
+
+def create_service() -> RecommendationService:
+    # LLM_PROVIDER=fake swaps Gemini for the local fake provider
+    provider = PROVIDERS[os.getenv("LLM_PROVIDER", "gemini")]()
+    return RecommendationService(
+        provider,
+        cache_size=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+        max_inflight=int(os.getenv("LLM_MAX_INFLIGHT", "4")),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "16")),
+    )
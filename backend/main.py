@@ -1,15 +1,33 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Union
 import pandas as pd
 import numpy as np
 import joblib
 import os
 import json
-from sklearn.metrics import accuracy_score, recall_score, roc_auc_score
-from google import genai
+import csv
+import io
+import itertools
+import asyncio
+import threading
+import time
 from dotenv import load_dotenv
+from scoring import ScoringEngine, FeatureEncoder, risk_level, risk_levels, set_inference_observer
+from stats_cube import AttritionCube
+from dataset import api_columns, frame_memory_mb, load_dataset
+from cache import LRUCache
+from metrics import Counter, Gauge, Histogram, Registry, RequestMetricsMiddleware
+from profiling import ProfiledRoute, ProfileStore, ProfilingMiddleware, authorized
+from drivers import DRIVERS, DriverECDF, key_drivers
+from model_store import load_store, process_memory
+from inference import parse_backends, select_backends
+from sharding import SHARD_ROWS, ShardedScorer, parse_workers
+from llm import create_service, driver_signature
+from admission import CreditLedger, Overloaded
+from evaluation import MODEL_FILES, FEATURE_COLUMNS_FILE, artifact_paths, file_hash, compute_model_metrics, load_model_metrics, load_training_manifest, replaced_atomically, resolve_model_dir, save_model_metrics
 
 # --------------------------------------------------
 # ENVIRONMENT & SECRETS
@@ -17,9 +35,8 @@ from dotenv import load_dotenv
 # Load variables from .env into the environment
 load_dotenv()
 
-# Initialize the Gemini client. 
-# It automatically finds GEMINI_API_KEY from the environment.
-gemini_client = genai.Client()
+# LLM provider for recommendations (Gemini unless LLM_PROVIDER=fake)
+recommendation_service = create_service()
 
 # --------------------------------------------------
 # APP SETUP
@@ -32,53 +49,166 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 # --------------------------------------------------
-# LOAD DATA & MODELS
+# METRICS
 # --------------------------------------------------
-df = pd.read_csv("WA_Fn-UseC_-HR-Employee-Attrition.csv")
+# Served at /metrics in Prometheus text format. Gauges read live state at scrape
+# time; everything else is a counter or histogram update on the request path.
+metrics = Registry()
+request_latency = metrics.register(Histogram("http_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"]))
+inference_latency = metrics.register(Histogram("model_inference_seconds", "predict_proba time per model call; ensemble includes its members.", ["model"]))
+inference_rows = metrics.register(Counter("model_inference_rows_total", "Rows scored per model.", ["model"]))
+predict_phase_latency = metrics.register(Histogram("predict_phase_seconds", "Time per /predict phase.", ["phase"]))
+llm_latency = metrics.register(Histogram("llm_request_duration_seconds", "Upstream LLM call latency.", ["provider"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)))
+llm_failures = metrics.register(Counter("llm_failures_total", "Failed upstream LLM calls.", ["provider"]))
+app.add_middleware(RequestMetricsMiddleware, histogram=request_latency)
+
+def observe_inference(model_name: str, seconds: float, rows: int):
+    inference_latency.observe(seconds, model_name)
+    inference_rows.inc(model_name, amount=rows)
+
+def observe_llm(provider: str, seconds: float, failed: bool):
+    llm_latency.observe(seconds, provider)
+    if failed:
+        llm_failures.inc(provider)
+
+set_inference_observer(observe_inference)
+recommendation_service.observer = observe_llm
 
-models = {
-    "logistic_regression": joblib.load("model_logreg_best.joblib"),
-    "random_forest": joblib.load("model_rf_best.joblib"),
-    "gradient_boosting": joblib.load("model_gb_best.joblib"),
-}
-rf_model = joblib.load("model_rf_best.joblib")
-feature_columns = joblib.load("model_feature_columns.joblib")
-TOP_RISK_CACHE = None
+# --------------------------------------------------
+# PROFILING
+# --------------------------------------------------
+# Callers holding PROFILE_TOKEN can send `X-Profile: <token>` (or ?profile=<token>)
+# to sample that one request into PROFILE_DIR; see GET /profiles. Without a token
+# nothing is installed and requests run exactly as before.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+profile_store = ProfileStore(os.getenv("PROFILE_DIR", "profiles"), int(os.getenv("PROFILE_KEEP", "50")))
+if PROFILE_TOKEN:
+    # Must be set before any route is declared
+    app.router.route_class = ProfiledRoute
+    app.add_middleware(ProfilingMiddleware, token=PROFILE_TOKEN, store=profile_store, interval=PROFILE_INTERVAL_MS / 1000, exclude=["/profiles"])
+
+# --------------------------------------------------
+# LOAD MODELS
+# --------------------------------------------------
+DATA_PATH = "WA_Fn-UseC_-HR-Employee-Attrition.csv"
+
+# Directory written by `python model_store.py`; when set, models are memory-mapped
+# from it so every worker on the node shares one copy via the page cache
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR", "")
+
+# Artifacts written by `python train.py`: one version directory, or the directory
+# holding them to serve the newest. Empty = the joblib files next to main.py.
+MODEL_DIR = resolve_model_dir(os.getenv("MODEL_DIR", ""))
+training_manifest = load_training_manifest(MODEL_DIR) if MODEL_DIR else None
+
+ARTIFACTS_HASH = file_hash(artifact_paths(MODEL_DIR))
+MEMORY_BEFORE_MODELS = process_memory()
+# Each artifact is loaded exactly once
+if MODEL_STORE_DIR:
+    models, feature_columns = load_store(MODEL_STORE_DIR, ARTIFACTS_HASH)
+else:
+    models = {name: joblib.load(os.path.join(MODEL_DIR, path)) for name, path in MODEL_FILES.items()}
+    feature_columns = joblib.load(os.path.join(MODEL_DIR, FEATURE_COLUMNS_FILE))
+MEMORY_AFTER_MODELS = process_memory()
+if training_manifest is not None and training_manifest["feature_columns"] != list(feature_columns):
+    raise ValueError(f"{MODEL_DIR}: feature columns don't match its manifest")
+
+# Per-model inference backend, e.g. "random_forest=compiled,gradient_boosting=compiled".
+# Compiled models are checked against the originals on the first rows of the dataset
+# and only swapped in when their probabilities match.
+INFERENCE_BACKENDS = parse_backends(os.getenv("INFERENCE_BACKENDS", ""))
+PARITY_SAMPLE_ROWS = 512
+if INFERENCE_BACKENDS:
+    parity_sample = FeatureEncoder(feature_columns).encode_frame(pd.read_csv(DATA_PATH, nrows=PARITY_SAMPLE_ROWS))
+    models, inference_report = select_backends(models, INFERENCE_BACKENDS, parity_sample, feature_columns)
+else:
+    inference_report = {name: {"backend": "default"} for name in models}
+
+# Worker processes for scoring whole extracts (startup, reloads, metrics): "auto" is
+# one per core, 0 keeps scoring in-process. Batches smaller than one shard stay in-process.
+SCORING_WORKERS = parse_workers(os.getenv("SCORING_WORKERS", "0"))
+SCORING_SHARD_ROWS = int(os.getenv("SCORING_SHARD_ROWS", str(SHARD_ROWS)))
+sharded_scorer = ShardedScorer(models, feature_columns, SCORING_WORKERS, SCORING_SHARD_ROWS) if SCORING_WORKERS > 0 else None
+
+@app.on_event("shutdown")
+def stop_sharded_scorer():
+    if sharded_scorer is not None:
+        sharded_scorer.close()
 
 # --------------------------------------------------
 # COMPUTE MODEL METRICS
 # --------------------------------------------------
-def compute_model_metrics():
-    X = pd.get_dummies(df.drop("Attrition", axis=1))
-    X = X.reindex(columns=feature_columns, fill_value=0)
-    y = df["Attrition"].map({"Yes": 1, "No": 0})
-
-    metrics = {}
-    for name, model in models.items():
-        y_pred = model.predict(X)
-        y_pred_proba = model.predict_proba(X)[:, 1]
-        accuracy = accuracy_score(y, y_pred)
-        recall = recall_score(y, y_pred, pos_label=1)
-        auc = roc_auc_score(y, y_pred_proba)
-        metrics[name] = {
-            "accuracy": round(accuracy, 2),
-            "recall": round(recall, 2),
-            "auc": round(auc, 2)
-        }
-    ensemble_acc = np.mean([metrics[m]["accuracy"] for m in metrics])
-    ensemble_recall = np.mean([metrics[m]["recall"] for m in metrics])
-    ensemble_auc = np.mean([metrics[m]["auc"] for m in metrics])
-    metrics["ensemble"] = {
-        "accuracy": round(ensemble_acc, 2),
-        "recall": round(ensemble_recall, 2),
-        "auc": round(ensemble_auc, 2)
-    }
+def model_metrics_for(data: pd.DataFrame, engine: ScoringEngine, data_hash: str):
+    # Persisted metrics let a worker start without scoring the dataset; they are
+    # recomputed (and saved next to the artifacts for the next worker) only when
+    # artifacts or data change
+    metrics = load_model_metrics(MODEL_DIR, ARTIFACTS_HASH, data_hash)
+    if metrics is None:
+        metrics = compute_model_metrics(data, engine, models)
+        save_model_metrics(MODEL_DIR, ARTIFACTS_HASH, data_hash, metrics)
     return metrics
 
-MODEL_METRICS = compute_model_metrics()
+# --------------------------------------------------
+# LOAD DATA
+# --------------------------------------------------
+class DataState:
+    # Everything derived from one dataset extract. Requests read `state` once and
+    # reloads replace it with a single assignment, so they never see a mix.
+    _versions = itertools.count()
+
+    def __init__(self, data: pd.DataFrame, engine: ScoringEngine, mtime: float, data_hash: str, source: str):
+        self.df = data
+        self.source = source
+        # Encoded population and per-model score vectors
+        self.engine = engine
+        # Attrition counts per Department x JobRole cell; /stats filters just pick cells
+        self.stats_cube = AttritionCube(data)
+        # Sorted driver columns for key-driver percentiles
+        self.driver_ecdf = DriverECDF(data)
+        self.data_hash = data_hash
+        self._model_metrics = None
+        self._metrics_lock = threading.Lock()
+        self.mtime = mtime
+        self.version = next(self._versions)
+        # Seconds to read, encode and index this extract; set by whoever loaded it
+        self.load_seconds = 0.0
+
+    @property
+    def model_metrics(self):
+        # Read or computed on first use, not while loading: a reload then scores only
+        # the rows it reports as rescored, and models nobody has used stay unscored
+        if self._model_metrics is None:
+            with self._metrics_lock:
+                if self._model_metrics is None:
+                    self._model_metrics = model_metrics_for(self.df, self.engine, self.data_hash)
+        return self._model_metrics
+
+# Only the columns the API reads are loaded, from the compact Parquet copy when available
+DATA_COLUMNS = api_columns(feature_columns)
+
+def load_state():
+    start = time.perf_counter()
+    mtime = os.path.getmtime(DATA_PATH)
+    data_hash = file_hash([DATA_PATH])
+    data, source = load_dataset(DATA_PATH, DATA_COLUMNS, data_hash)
+    current = DataState(data, ScoringEngine(data, models, feature_columns, sharded=sharded_scorer), mtime, data_hash, source)
+    current.load_seconds = time.perf_counter() - start
+    return current
+
+state = load_state()
+
+# /stats responses keyed by (data version, normalized filters)
+STATS_CACHE_SIZE = 256
+stats_cache = LRUCache(STATS_CACHE_SIZE)
+
+def invalidate_caches():
+    # Call whenever the dataset or models are (re)loaded
+    stats_cache.clear()
 
 # --------------------------------------------------
 # JOB ROLE MAPPING
@@ -104,107 +234,79 @@ class PredictRequest(BaseModel):
     model_name: str = "random_forest"
     what_if: Optional[Dict[str, Union[str, int]]] = {}
 
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest]
+
+# Grid points per sweep, across all axes
+SWEEP_MAX_POINTS = 10000
+
+class SweepAxis(BaseModel):
+    feature: str
+    values: Optional[List[Union[str, int, float]]] = Field(None, max_length=SWEEP_MAX_POINTS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = Field(10, ge=1, le=SWEEP_MAX_POINTS)
+
+class SweepRequest(BaseModel):
+    employee_id: int
+    model_name: str = "random_forest"
+    what_if: Optional[Dict[str, Union[str, int]]] = {}
+    axes: List[SweepAxis]
+
 class RecommendationRequest(BaseModel):
     employee_id: int
     risk_probability: float
     risk_level: str
     key_drivers: list
 
-# Simple in-memory counter for your presentation
+# Daily LLM credits, shared by every worker through a SQLite ledger. The per-client
+# cap defaults to the whole budget, so a single-user dashboard (every request from
+# one address) can spend all of it; lower it when several clients share the API.
 DAILY_LIMIT = 250
-credits_used = 0
+CLIENT_DAILY_LIMIT = int(os.getenv("CLIENT_DAILY_LIMIT", str(DAILY_LIMIT)))
+credit_ledger = CreditLedger(os.getenv("CREDITS_DB", "credits.db"), DAILY_LIMIT, CLIENT_DAILY_LIMIT)
+
+# X-Client-Id is caller-controlled, so it only keys quotas when a proxy in front of
+# the API authenticates callers and sets it (TRUST_CLIENT_ID_HEADER=1); otherwise
+# quotas are per address
+TRUST_CLIENT_ID_HEADER = int(os.getenv("TRUST_CLIENT_ID_HEADER", "0"))
+
+def client_id(request: Request):
+    address = request.client.host if request.client else "unknown"
+    if TRUST_CLIENT_ID_HEADER:
+        return request.headers.get("X-Client-Id") or address
+    return address
 
 @app.get("/credits")
-def get_credits():
-    return {"remaining": DAILY_LIMIT - credits_used, "limit": DAILY_LIMIT}
+def get_credits(request: Request):
+    client = client_id(request)
+    return {
+        "remaining": credit_ledger.remaining(), "limit": DAILY_LIMIT,
+        "client_remaining": credit_ledger.client_remaining(client), "client_limit": CLIENT_DAILY_LIMIT,
+    }
 
 # --------------------------------------------------
 # HELPER FUNCTIONS
 # --------------------------------------------------
-def attrition_agg(data: pd.DataFrame, col: str):
-    return (
-        data[data["Attrition"] == "Yes"][col]
-        .value_counts()
-        .reset_index()
-        .rename(columns={"index": "name", col: "value"})
-        .to_dict("records")
-    )
-
-def build_feature_vector(row: pd.Series):
-    X = pd.DataFrame([row])
-    X = pd.get_dummies(X)
-    X = X.reindex(columns=feature_columns, fill_value=0)
-    return X
-
-def get_contribution(feature, value, df):
-    if feature == "OverTime":
-        val_num = 1 if value == "Yes" else 0
-        percentile = (df[feature].map({"No": 0, "Yes": 1}) <= val_num).mean() * 100
-        return round(percentile, 1)
-    elif feature in ["JobSatisfaction", "WorkLifeBalance", "MonthlyIncome", "YearsWithCurrManager"]:
-        percentile = (df[feature] <= value).mean() * 100
-        return round(100 - percentile, 1)
-    elif feature in ["YearsAtCompany", "YearsSinceLastPromotion"]:
-        percentile = (df[feature] <= value).mean() * 100
-        return round(percentile, 1)
-    else:
-        return 25.0
-
-def generate_recommendations(row: pd.Series, what_if: Dict[str, Union[str, int]]):
-    key_drivers = []
-    eval_row = row.copy()
-    for feature, value in what_if.items():
-        if feature in eval_row:
-            eval_row[feature] = value
+def resolve_model_key(model_name: str):
+    if model_name == "ensemble": return "ensemble"
+    model_key = model_name.lower().replace(" ", "_")
+    return model_key if model_key in models else None
 
-    # Overtime
-    overtime = eval_row.get("OverTime", "No")
-    impact = "High" if overtime == "Yes" else "Low"
-    key_drivers.append({"factor": "Overtime", "impact": impact, "contribution": get_contribution("OverTime", overtime, df)})
-
-    # Job Satisfaction
-    job_sat = eval_row.get("JobSatisfaction", 3)
-    impact = "High" if job_sat == 1 else "Medium" if job_sat == 2 else "Low"
-    key_drivers.append({"factor": "Job Satisfaction", "impact": impact, "contribution": get_contribution("JobSatisfaction", job_sat, df)})
-
-    # Work Life Balance
-    wlb = eval_row.get("WorkLifeBalance", 3)
-    impact = "High" if wlb == 1 else "Medium" if wlb == 2 else "Low"
-    key_drivers.append({"factor": "Work-Life Balance", "impact": impact, "contribution": get_contribution("WorkLifeBalance", wlb, df)})
-
-    # Monthly Income
-    income = eval_row.get("MonthlyIncome", 5000)
-    impact = "High" if income < 4000 else "Low"
-    key_drivers.append({"factor": "Monthly Income", "impact": impact, "contribution": get_contribution("MonthlyIncome", income, df)})
-
-    # Years at Company
-    tenure = eval_row.get("YearsAtCompany", 5)
-    impact = "High" if tenure > 10 else "Low"
-    key_drivers.append({"factor": "Years at Company", "impact": impact, "contribution": get_contribution("YearsAtCompany", tenure, df)})
-
-    # Years with Manager
-    years_mgr = eval_row.get("YearsWithCurrManager", 3)
-    impact = "High" if years_mgr < 2 else "Low"
-    key_drivers.append({"factor": "Years with Manager", "impact": impact, "contribution": get_contribution("YearsWithCurrManager", years_mgr, df)})
-
-    # Recent Promotion
-    years_last_promo = eval_row.get("YearsSinceLastPromotion", 2)
-    impact = "High" if years_last_promo > 5 else "Low"
-    key_drivers.append({"factor": "Recent Promotion", "impact": impact, "contribution": get_contribution("YearsSinceLastPromotion", years_last_promo, df)})
-
-    return None, key_drivers # Recommendations removed, handled by LLM now
+def generate_recommendations(row: pd.Series, what_if: Dict[str, Union[str, int]], ecdf: DriverECDF):
+    return None, key_drivers([row], [what_if], ecdf)[0] # Recommendations removed, handled by LLM now
 
 # --------------------------------------------------
 # DASHBOARD ENDPOINTS
 # --------------------------------------------------
-def compute_top_risk_employees(limit=5):
-    risk_scores = []
-    for _, row in df.iterrows():
-        X = pd.DataFrame([row])
-        X = pd.get_dummies(X)
-        X = X.reindex(columns=feature_columns, fill_value=0)
-        prob = rf_model.predict_proba(X)[0][1]
+def top_risk_employees(current: DataState, model_key="random_forest", limit=5, offset=0, departments=None, job_roles=None):
+    probs = current.engine.scores(model_key)
+    positions, total = current.engine.leaderboard(model_key).query(limit, offset, departments, job_roles)
 
+    risk_scores = []
+    for pos in positions:
+        row = current.df.iloc[pos]
+        prob = probs[pos]
         risk_scores.append({
             "employee_id": int(row["EmployeeNumber"]),
             "department": row["Department"],
@@ -213,52 +315,39 @@ def compute_top_risk_employees(limit=5):
             "years_at_company": int(row["YearsAtCompany"]),
             "monthly_income": float(row["MonthlyIncome"]),
             "risk_probability": round(float(prob) * 100, 2),
-            "risk_level": "High" if prob >= 0.7 else "Medium" if prob >= 0.4 else "Low"
+            "risk_level": risk_level(prob)
         })
+    return risk_scores, total
 
-    risk_scores.sort(key=lambda x: x["risk_probability"], reverse=True)
-    return risk_scores[:limit]
+def normalize_filter(values: Optional[List[str]]):
+    return tuple(sorted(set(values))) if values else ()
 
 @app.post("/stats")
 def get_dashboard_stats(filters: StatsFilter):
-    filtered_df = df.copy()
-    if filters.departments:
-        filtered_df = filtered_df[filtered_df["Department"].isin(filters.departments)]
-    if filters.job_roles:
-        filtered_df = filtered_df[filtered_df["JobRole"].isin(filters.job_roles)]
-
-    total_employees = len(filtered_df)
-    attrition_count = len(filtered_df[filtered_df["Attrition"] == "Yes"])
-
-    filtered_df["TenureBand"] = pd.cut(filtered_df["YearsAtCompany"], bins=[0, 2, 5, 10, 40], labels=["0–2", "2–5", "5–10", "10+"])
-    filtered_df["IncomeBand"] = pd.qcut(filtered_df["MonthlyIncome"], q=4, labels=["Low", "Medium", "High", "Very High"])
-
-    return {
-        "kpis": {
-            "total_employees": total_employees,
-            "attrition_rate": round((attrition_count / total_employees) * 100, 2) if total_employees else 0,
-            "avg_satisfaction": round(filtered_df["EnvironmentSatisfaction"].mean(), 2),
-            "high_risk_employees": attrition_count,
-        },
-        "attrition_by_department": attrition_agg(filtered_df, "Department"),
-        "attrition_by_job_role": attrition_agg(filtered_df, "JobRole"),
-        "attrition_by_job_level": attrition_agg(filtered_df, "JobLevel"),
-        "attrition_by_overtime": attrition_agg(filtered_df, "OverTime"),
-        "attrition_by_job_satisfaction": attrition_agg(filtered_df, "JobSatisfaction"),
-        "attrition_by_worklife_balance": attrition_agg(filtered_df, "WorkLifeBalance"),
-        "attrition_by_tenure": attrition_agg(filtered_df, "TenureBand"),
-        "attrition_by_income_band": attrition_agg(filtered_df, "IncomeBand"),
-    }
+    departments = normalize_filter(filters.departments)
+    job_roles = normalize_filter(filters.job_roles)
+    current = state
+    key = (current.version, departments, job_roles)
+    result = stats_cache.get(key)
+    if result is None:
+        result = current.stats_cube.query(departments, job_roles)
+        stats_cache.put(key, result)
+    return result
+
+@app.get("/stats/cache")
+def get_stats_cache():
+    return stats_cache.stats()
 
 @app.get("/employees")
 def get_employees():
-    return df[["EmployeeNumber", "Department", "JobRole"]].drop_duplicates().rename(columns={"EmployeeNumber": "employee_id", "Department": "department", "JobRole": "job_role"}).to_dict("records")
+    return state.df[["EmployeeNumber", "Department", "JobRole"]].drop_duplicates().rename(columns={"EmployeeNumber": "employee_id", "Department": "department", "JobRole": "job_role"}).to_dict("records")
 
 @app.get("/employee/{employee_id}")
 def get_employee(employee_id: int):
-    emp = df[df["EmployeeNumber"] == employee_id]
-    if emp.empty: return {"error": "Employee not found"}
-    r = emp.iloc[0]
+    current = state
+    pos = current.engine.position(employee_id)
+    if pos is None: return {"error": "Employee not found"}
+    r = current.df.iloc[pos]
     return {
         "employee_id": employee_id, "department": r["Department"], "job_role": r["JobRole"],
         "job_level": int(r["JobLevel"]), "years_at_company": int(r["YearsAtCompany"]),
@@ -267,6 +356,38 @@ def get_employee(employee_id: int):
         "overtime": r["OverTime"],
     }
 
+@app.get("/models/memory")
+def get_model_memory():
+    return {
+        "backend": "mmap" if MODEL_STORE_DIR else "joblib",
+        "before_models": MEMORY_BEFORE_MODELS,
+        "after_models": MEMORY_AFTER_MODELS,
+        "current": process_memory(),
+    }
+
+@app.get("/dataset")
+def get_dataset_info():
+    current = state
+    return {
+        "source": current.source, "rows": len(current.df), "columns": list(current.df.columns),
+        "memory_mb": frame_memory_mb(current.df), "version": current.version,
+    }
+
+@app.get("/models/backends")
+def get_model_backends():
+    return inference_report
+
+@app.get("/models/version")
+def get_model_version():
+    if training_manifest is None:
+        return {"version": None, "model_dir": MODEL_DIR or ".", "artifacts_hash": ARTIFACTS_HASH}
+    keys = ("version", "created", "data_hash", "rows", "warm_started_from", "metrics")
+    return {
+        **{k: training_manifest.get(k) for k in keys},
+        "model_dir": MODEL_DIR, "artifacts_hash": ARTIFACTS_HASH,
+        "models": {name: {k: spec[k] for k in ("params", "cv_average_precision", "holdout")} for name, spec in training_manifest["models"].items()},
+    }
+
 @app.get("/filters")
 def get_filter_options(departments: str = Query("")):
     if departments:
@@ -281,87 +402,473 @@ def get_filter_options(departments: str = Query("")):
     return {"departments": sorted(JOB_ROLE_BY_DEPARTMENT.keys()), "job_roles": job_roles}
 
 @app.get("/top_risk_employees")
-def get_top_risk_employees(limit: int = 5):
-    global TOP_RISK_CACHE
-    if TOP_RISK_CACHE is None:
-        TOP_RISK_CACHE = compute_top_risk_employees(limit)
-    return TOP_RISK_CACHE
+def get_top_risk_employees(
+    response: Response,
+    limit: int = Query(5, ge=0),
+    offset: int = Query(0, ge=0),
+    model_name: str = "random_forest",
+    departments: str = Query(""),
+    job_roles: str = Query(""),
+):
+    model_key = resolve_model_key(model_name)
+    if model_key is None: return {"error": f"Model {model_name} not found"}
+    dept_list = [d for d in departments.split(',') if d]
+    role_list = [r for r in job_roles.split(',') if r]
+    risk_scores, total = top_risk_employees(state, model_key, limit, offset, dept_list, role_list)
+    response.headers["X-Total-Count"] = str(total)
+    return risk_scores
 
 # --------------------------------------------------
 # PREDICT (DETERMINISTIC)
 # --------------------------------------------------
-@app.post("/predict")
-def predict_attrition(req: PredictRequest):
-    emp = df[df["EmployeeNumber"] == req.employee_id]
-    if emp.empty: return {"error": "Employee not found"}
+def prepare_prediction(current: DataState, req: PredictRequest):
+    # Returns (row position, model key, encoded features) or an error response
+    pos = current.engine.position(req.employee_id)
+    if pos is None: return {"error": "Employee not found"}
 
-    row = emp.iloc[0].copy()
-    for feature, value in req.what_if.items():
-        if feature in row: row[feature] = value
+    try:
+        x = current.engine.feature_vector(pos, req.what_if)
+    except ValueError as e:
+        return {"error": str(e)}
 
-    X = build_feature_vector(row)
+    model_key = resolve_model_key(req.model_name)
+    if model_key is None: return {"error": f"Model {req.model_name} not found"}
+    return pos, model_key, x
 
-    if req.model_name == "ensemble":
-        probs = [model.predict_proba(X)[0][1] for model in models.values()]
-        risk_prob = np.mean(probs)
-    else:
-        model_key = req.model_name.lower().replace(" ", "_")
-        if model_key not in models: return {"error": f"Model {req.model_name} not found"}
-        risk_prob = models[model_key].predict_proba(X)[0][1]
+def prediction_response(current: DataState, req: PredictRequest, pos: int, risk_prob: float, drivers=None):
+    if drivers is None:
+        _, drivers = generate_recommendations(current.df.iloc[pos], req.what_if, current.driver_ecdf)
 
-    risk_level = "High" if risk_prob >= 0.7 else "Medium" if risk_prob >= 0.4 else "Low"
-    _, key_drivers = generate_recommendations(row, req.what_if)
-    
     metrics_key = req.model_name.lower().replace(" ", "_")
-    selected_metrics = MODEL_METRICS.get(metrics_key, MODEL_METRICS["random_forest"])
+    selected_metrics = current.model_metrics.get(metrics_key, current.model_metrics["random_forest"])
 
     return {
         "employee_id": req.employee_id,
         "risk_probability": round(float(risk_prob) * 100, 2),
-        "risk_level": risk_level,
+        "risk_level": risk_level(risk_prob),
         "model_used": req.model_name,
-        "key_drivers": key_drivers,
+        "key_drivers": drivers,
         "model_metrics": selected_metrics,
     }
 
+@app.post("/predict")
+def predict_attrition(req: PredictRequest):
+    current = state
+    with predict_phase_latency.time("prepare"):
+        prepared = prepare_prediction(current, req)
+    if isinstance(prepared, dict): return prepared
+    pos, model_key, x = prepared
+
+    with predict_phase_latency.time("inference"):
+        risk_prob = current.engine.predict(x[np.newaxis, :], model_key)[0]
+    with predict_phase_latency.time("drivers"):
+        return prediction_response(current, req, pos, risk_prob)
+
+@app.post("/predict/batch")
+def predict_attrition_batch(req: BatchPredictRequest):
+    current = state
+    results = [None] * len(req.items)
+    valid, positions, model_keys, rows = [], [], [], []
+    for i, item in enumerate(req.items):
+        prepared = prepare_prediction(current, item)
+        if isinstance(prepared, dict):
+            results[i] = prepared
+            continue
+        pos, model_key, x = prepared
+        valid.append(i)
+        positions.append(pos)
+        model_keys.append(model_key)
+        rows.append(x)
+
+    if valid:
+        probs = current.engine.predict_rows(np.vstack(rows), model_keys)
+        drivers = key_drivers([current.df.iloc[pos] for pos in positions], [req.items[i].what_if for i in valid], current.driver_ecdf)
+        for i, pos, prob, item_drivers in zip(valid, positions, probs, drivers):
+            results[i] = prediction_response(current, req.items[i], pos, prob, item_drivers)
+    return results
+
+def sweep_axis_size(axis: SweepAxis):
+    if axis.values is not None: return len(axis.values)
+    if axis.start is None or axis.stop is None: return 0
+    return axis.steps
+
+def sweep_axis_values(axis: SweepAxis):
+    if axis.values is not None: return list(axis.values)
+    return np.linspace(axis.start, axis.stop, axis.steps).tolist()
+
+@app.post("/predict/sweep")
+def predict_sweep(req: SweepRequest):
+    if not 1 <= len(req.axes) <= 2: return {"error": "Sweep takes one or two axes"}
+    # Sized before anything is built, so an oversized grid is never allocated
+    sizes = [sweep_axis_size(axis) for axis in req.axes]
+    for axis, size in zip(req.axes, sizes):
+        if not size: return {"error": f"No values given for {axis.feature}"}
+    if int(np.prod(sizes)) > SWEEP_MAX_POINTS:
+        return {"error": f"Sweep exceeds {SWEEP_MAX_POINTS} points"}
+    axes = [(axis.feature, sweep_axis_values(axis)) for axis in req.axes]
+
+    current = state
+    prepared = prepare_prediction(current, PredictRequest(employee_id=req.employee_id, model_name=req.model_name, what_if=req.what_if))
+    if isinstance(prepared, dict): return prepared
+    _, model_key, x = prepared
+
+    try:
+        X = current.engine.encoder.grid(x, axes)
+    except ValueError as e:
+        return {"error": str(e)}
+    probs = current.engine.predict(X, model_key).reshape([len(values) for _, values in axes])
+
+    metrics_key = req.model_name.lower().replace(" ", "_")
+    return {
+        "employee_id": req.employee_id,
+        "model_used": req.model_name,
+        "features": [feature for feature, _ in axes],
+        "values": [values for _, values in axes],
+        "risk_probability": np.round(probs * 100, 2).tolist(),
+        "model_metrics": current.model_metrics.get(metrics_key, current.model_metrics["random_forest"]),
+    }
+
+# --------------------------------------------------
+# SCORE EXPORT
+# --------------------------------------------------
+# The full score table is streamed a chunk at a time: only one chunk of records
+# (plus the cached score vector) is ever in memory, whatever the org size.
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DRIVER_COLUMNS = [factor.lower().replace(" ", "_").replace("-", "_") for factor, _, _, _ in DRIVERS]
+EXPORT_CSV_HEADER = ["employee_id", "department", "job_role", "risk_probability", "risk_level"] + [
+    f"{name}_{field}" for name in DRIVER_COLUMNS for field in ("impact", "contribution")
+]
+
+def export_chunks(current: DataState, model_key: str, positions: np.ndarray, fmt: str):
+    probs = current.engine.scores(model_key)
+    columns = ["EmployeeNumber", "Department", "JobRole"] + [feature for _, feature, _, _ in DRIVERS]
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_HEADER)
+        yield buffer.getvalue()
+
+    for start in range(0, len(positions), EXPORT_CHUNK_ROWS):
+        chunk = positions[start:start + EXPORT_CHUNK_ROWS]
+        rows = current.df.iloc[chunk][columns].to_dict("records")
+        chunk_probs = probs[chunk]
+        levels = risk_levels(chunk_probs)
+        drivers = key_drivers(rows, [{}] * len(rows), current.driver_ecdf)
+
+        if fmt == "ndjson":
+            yield "".join(json.dumps({
+                "employee_id": int(row["EmployeeNumber"]), "department": row["Department"], "job_role": row["JobRole"],
+                "risk_probability": round(float(prob) * 100, 2), "risk_level": str(level), "key_drivers": row_drivers,
+            }) + "\n" for row, prob, level, row_drivers in zip(rows, chunk_probs, levels, drivers))
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row, prob, level, row_drivers in zip(rows, chunk_probs, levels, drivers):
+                writer.writerow(
+                    [int(row["EmployeeNumber"]), row["Department"], row["JobRole"], round(float(prob) * 100, 2), level]
+                    + [value for d in row_drivers for value in (d["impact"], d["contribution"])]
+                )
+            yield buffer.getvalue()
+
+@app.get("/export/scores")
+def export_scores(
+    model_name: str = "random_forest",
+    format: str = "ndjson",
+    departments: str = Query(""),
+    job_roles: str = Query(""),
+):
+    model_key = resolve_model_key(model_name)
+    if model_key is None: return {"error": f"Model {model_name} not found"}
+    if format not in EXPORT_FORMATS: return {"error": f"Unsupported format {format}; use one of {', '.join(EXPORT_FORMATS)}"}
+    # Pin the dataset version so a reload mid-stream can't mix two extracts
+    current = state
+    mask = np.ones(len(current.df), dtype=bool)
+    dept_list = [d for d in departments.split(',') if d]
+    role_list = [r for r in job_roles.split(',') if r]
+    if dept_list: mask &= current.df["Department"].isin(dept_list).to_numpy()
+    if role_list: mask &= current.df["JobRole"].isin(role_list).to_numpy()
+    return StreamingResponse(
+        export_chunks(current, model_key, np.flatnonzero(mask), format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=risk_scores_{model_key}_v{current.version}.{format}"},
+    )
+
+# --------------------------------------------------
+# DATA RELOAD
+# --------------------------------------------------
+# Every worker holds its own DataState, so a reload has to reach each of them. The
+# watcher checks DATA_PATH's mtime and RELOAD_MARKER, which POST /reload rewrites
+# after reloading the worker that received it. It runs every DATA_WATCH_INTERVAL
+# seconds (0 disables it) and defaults on when uvicorn runs several workers
+# (WEB_CONCURRENCY, which `uvicorn --workers` does not set). With the watcher off,
+# /reload only reloads the process that handled the request.
+UVICORN_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "5" if UVICORN_WORKERS > 1 else "0"))
+RELOAD_MARKER = os.getenv("RELOAD_MARKER", "reload.marker")
+reload_lock = threading.Lock()
+
+def read_reload_marker():
+    try:
+        with open(RELOAD_MARKER) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def signal_reload():
+    # Recorded as seen before it's written, so this worker's watcher doesn't reload again
+    global reload_marker
+    reload_marker = f"{os.getpid()}-{time.time_ns()}"
+    with replaced_atomically(RELOAD_MARKER) as tmp_path, open(tmp_path, "w") as f:
+        f.write(reload_marker)
+
+reload_marker = read_reload_marker()
+
+def reload_dataset():
+    # Only employees added or changed since the loaded extract are re-encoded and rescored
+    global state
+    with reload_lock:
+        start = time.perf_counter()
+        mtime = os.path.getmtime(DATA_PATH)
+        data_hash = file_hash([DATA_PATH])
+        data, source = load_dataset(DATA_PATH, DATA_COLUMNS, data_hash)
+        engine, summary = state.engine.refresh(data)
+        current = DataState(data, engine, mtime, data_hash, source)
+        current.load_seconds = time.perf_counter() - start
+        state = current
+        invalidate_caches()
+    schedule_prefetch()
+    return {**summary, "version": state.version}
+
+def watch_dataset():
+    global reload_marker
+    while True:
+        time.sleep(DATA_WATCH_INTERVAL)
+        try:
+            marker = read_reload_marker()
+            if os.path.getmtime(DATA_PATH) != state.mtime or marker != reload_marker:
+                reload_marker = marker
+                print(f"Dataset reloaded: {reload_dataset()}")
+        except Exception as e:
+            print(f"Dataset reload error: {e}")
+
+if DATA_WATCH_INTERVAL > 0:
+    threading.Thread(target=watch_dataset, daemon=True).start()
+
+@app.post("/reload")
+def reload_data():
+    # Reloads this worker now; the others follow on their next watcher check
+    try:
+        summary = reload_dataset()
+        signal_reload()
+    except Exception as e:
+        return {"error": f"Reload failed: {e}"}
+    return {**summary, "watch_interval": DATA_WATCH_INTERVAL}
+
 # --------------------------------------------------
 # LLM RECOMMENDATIONS (ON-DEMAND)
 # --------------------------------------------------
 @app.post("/generate_recommendations")
-def get_ai_recommendations(req: RecommendationRequest):
-    global credits_used
+async def get_ai_recommendations(req: RecommendationRequest, request: Request):
+    client = client_id(request)
 
-    if credits_used >= DAILY_LIMIT:
+    # Cached (or already in-flight) answers are free, so they are served even once the daily limit is hit.
+    # Ledger calls can wait on another worker's write lock, so they run off the event loop.
+    signature = driver_signature(req.risk_level, req.key_drivers)
+    try:
+        llm_recommendations, _ = await recommendation_service.recommend(
+            signature,
+            spend=lambda: asyncio.to_thread(credit_ledger.try_spend, client),
+            refund=lambda: asyncio.to_thread(credit_ledger.refund, client),
+        )
+    except Overloaded:
+        return JSONResponse(status_code=429, headers={"Retry-After": "5"}, content={
+            "error": "Too many AI requests in progress.",
+            "recommendations": ["AI recommendations are busy right now. Please try again in a few seconds."],
+            "credits_remaining": await asyncio.to_thread(credit_ledger.remaining),
+            "client_remaining": await asyncio.to_thread(credit_ledger.client_remaining, client),
+        })
+    except Exception as e:
+        print(f"Gemini API Error: {e}")
+        llm_recommendations = ["Could not generate AI recommendations at this time. Please check system logs."]
+
+    # credits_remaining is the global budget on every path, as in /credits; the
+    # caller's own quota is client_remaining
+    credits_remaining = await asyncio.to_thread(credit_ledger.remaining)
+    client_remaining = await asyncio.to_thread(credit_ledger.client_remaining, client)
+    if llm_recommendations is None:
         return {
             "error": "Daily limit reached.", 
             "recommendations": ["Daily AI limit reached. Please try again tomorrow."],
-            "credits_remaining": 0
+            "credits_remaining": credits_remaining,
+            "client_remaining": client_remaining
         }
 
-    prompt = f"""
-    You are an HR Analytics expert. An employee (ID: {req.employee_id}) has an attrition risk probability of {req.risk_probability}% (Risk Level: {req.risk_level}).
-    
-    Here are the specific risk drivers and their impact levels calculated by our ML model:
-    {json.dumps(req.key_drivers)}
+    return {
+        "recommendations": llm_recommendations,
+        "credits_remaining": credits_remaining,
+        "client_remaining": client_remaining
+    }
 
-    Based on these specific drivers and the overall risk level, provide 3 to 4 short, highly actionable recommendations for the manager to retain this employee.
-    Respond STRICTLY with a valid JSON array of strings. Example: ["Recommendation 1", "Recommendation 2"]
-    """
+@app.get("/generate_recommendations/stats")
+def get_recommendation_stats():
+    return recommendation_service.stats()
 
+# --------------------------------------------------
+# RECOMMENDATION PREFETCH
+# --------------------------------------------------
+# Opt-in (PREFETCH_TOP_N > 0): after each (re)load, recommendations for the top of
+# the risk leaderboard are generated in the background, so opening a top-risk card
+# and clicking for actions is a cache read. It costs a full scoring pass with
+# PREFETCH_MODEL right after boot. The recommendation cache is per process, so only
+# the worker holding PREFETCH_LOCK prefetches; the others would pay for the same
+# answers again. Prefetch spends its own daily budget in a separate ledger and never
+# touches the users' credits.
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "0"))
+PREFETCH_MODEL = os.getenv("PREFETCH_MODEL", "random_forest")
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+PREFETCH_DAILY_LIMIT = int(os.getenv("PREFETCH_DAILY_LIMIT", "50"))
+PREFETCH_LOCK = os.getenv("PREFETCH_LOCK", "prefetch.lock")
+PREFETCH_CLIENT = "prefetch"
+prefetch_ledger = CreditLedger(os.getenv("PREFETCH_CREDITS_DB", "prefetch_credits.db"), PREFETCH_DAILY_LIMIT, None)
+
+prefetch_status = {"state": "idle"}
+prefetch_task = None
+prefetch_lock = None
+event_loop = None
+
+def claim_prefetch() -> bool:
+    # Non-blocking exclusive lock held for the life of the process; the OS drops it
+    # when the worker exits, so a restarted worker can take over
+    global prefetch_lock
     try:
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config={"response_mime_type": "application/json"}
-        )
-        llm_recommendations = json.loads(response.text)
-        credits_used += 1
+        import fcntl
+    except ImportError:
+        # No flock (Windows): fine for single-worker deployments
+        return True
+    lock = open(PREFETCH_LOCK, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    prefetch_lock = lock
+    return True
+
+def prefetch_signatures(current: DataState):
+    # Distinct driver signatures of the top-N employees, in leaderboard order
+    positions, _ = current.engine.leaderboard(PREFETCH_MODEL).query(PREFETCH_TOP_N)
+    probs = current.engine.scores(PREFETCH_MODEL)[positions]
+    rows = [current.df.iloc[pos] for pos in positions]
+    drivers = key_drivers(rows, [{}] * len(rows), current.driver_ecdf)
+    return list(dict.fromkeys(driver_signature(risk_level(p), d) for p, d in zip(probs, drivers)))
+
+async def prefetch_recommendations(current: DataState):
+    global prefetch_status
+    # Scoring and ranking can take a while on a cold engine, so keep it off the event loop
+    signatures = await asyncio.to_thread(prefetch_signatures, current)
+    status = {
+        "state": "running", "version": current.version, "model": PREFETCH_MODEL, "top_n": PREFETCH_TOP_N,
+        "signatures": len(signatures), "completed": 0, "generated": 0, "failed": 0, "skipped_budget": 0,
+        "started_at": time.time(), "finished_at": None,
+    }
+    prefetch_status = status
+    workers = asyncio.Semaphore(PREFETCH_WORKERS)
+
+    async def prefetch_one(signature):
+        async with workers:
+            try:
+                recommendations, called_upstream = await recommendation_service.recommend(
+                    signature,
+                    spend=lambda: asyncio.to_thread(prefetch_ledger.try_spend, PREFETCH_CLIENT),
+                    refund=lambda: asyncio.to_thread(prefetch_ledger.refund, PREFETCH_CLIENT),
+                )
+            except Exception as e:
+                print(f"Prefetch error: {e}")
+                status["failed"] += 1
+                return
+            if called_upstream:
+                status["generated"] += 1
+            if recommendations is None:
+                status["skipped_budget"] += 1
+            else:
+                status["completed"] += 1
+
+    await asyncio.gather(*[prefetch_one(signature) for signature in signatures])
+    status["state"] = "done"
+    status["finished_at"] = time.time()
+
+def schedule_prefetch():
+    # Safe to call from any thread; a newer dataset supersedes a prefetch still running
+    def start():
+        global prefetch_task
+        if prefetch_task is not None and not prefetch_task.done():
+            prefetch_task.cancel()
+        prefetch_task = asyncio.ensure_future(prefetch_recommendations(state))
+
+    # event_loop is only set in the worker that owns prefetching
+    if event_loop is not None:
+        event_loop.call_soon_threadsafe(start)
+
+@app.on_event("startup")
+async def start_prefetch():
+    global event_loop, prefetch_status
+    if PREFETCH_TOP_N <= 0:
+        return
+    if not claim_prefetch():
+        prefetch_status = {"state": "other_worker"}
+        return
+    event_loop = asyncio.get_running_loop()
+    schedule_prefetch()
+
+@app.get("/generate_recommendations/prefetch")
+def get_prefetch_status():
+    return {**prefetch_status, "credits_used": prefetch_ledger.used(), "daily_limit": PREFETCH_DAILY_LIMIT}
 
-    except Exception as e:
-        print(f"Gemini API Error: {e}")
-        llm_recommendations = ["Could not generate AI recommendations at this time. Please check system logs."]
+# --------------------------------------------------
+# METRICS ENDPOINT
+# --------------------------------------------------
+def cache_stats():
+    return {"stats": stats_cache.stats(), "llm_recommendations": recommendation_service.cache.stats()}
+
+metrics.register(Counter("cache_hits_total", "Cache hits.", ["cache"], collect=lambda: {(name,): c["hits"] for name, c in cache_stats().items()}))
+metrics.register(Counter("cache_misses_total", "Cache misses.", ["cache"], collect=lambda: {(name,): c["misses"] for name, c in cache_stats().items()}))
+metrics.register(Gauge("cache_hit_ratio", "Cache hit ratio since start.", ["cache"], collect=lambda: {(name,): c["hit_ratio"] for name, c in cache_stats().items()}))
+metrics.register(Gauge("cache_entries", "Entries currently cached.", ["cache"], collect=lambda: {(name,): c["size"] for name, c in cache_stats().items()}))
+metrics.register(Gauge("dataset_rows", "Employees in the loaded extract.", collect=lambda: {(): len(state.df)}))
+metrics.register(Gauge("dataset_load_seconds", "Time to load the current extract.", collect=lambda: {(): round(state.load_seconds, 6)}))
+metrics.register(Gauge("dataset_version", "Reload counter of the loaded extract.", collect=lambda: {(): state.version}))
+metrics.register(Gauge("llm_credits_remaining", "LLM credits left today across all workers.", collect=lambda: {(): credit_ledger.remaining()}))
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-    return {
-        "recommendations": llm_recommendations,
-        "credits_remaining": DAILY_LIMIT - credits_used
-    }
\ No newline at end of file
+# --------------------------------------------------
+# PROFILES ENDPOINTS
+# --------------------------------------------------
+def profile_access(request: Request):
+    if not PROFILE_TOKEN:
+        return JSONResponse(status_code=404, content={"error": "Profiling is disabled; set PROFILE_TOKEN"})
+    if not authorized(PROFILE_TOKEN, request.headers.get("X-Profile"), request.url.query.encode()):
+        return JSONResponse(status_code=403, content={"error": "Send the profiling token as X-Profile or ?profile="})
+    return None
+
+@app.get("/profiles")
+def list_profiles(request: Request, limit: int = Query(20, ge=1, le=200)):
+    denied = profile_access(request)
+    if denied is not None:
+        return denied
+    return {"profiles": profile_store.recent(limit)}
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request):
+    # Folded stacks: `flamegraph.pl < stacks.folded > flame.svg`, or open in speedscope
+    denied = profile_access(request)
+    if denied is not None:
+        return denied
+    path = profile_store.folded_path(profile_id)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "Profile not found"})
+    with open(path) as f:
+        return PlainTextResponse(f.read())
@@ -0,0 +1,147 @@
+import bisect
+import threading
+import time
+
+# --------------------------------------------------
+# METRIC TYPES
+# --------------------------------------------------
+# A minimal Prometheus text-exposition registry. Recording is a dict lookup and a
+# couple of additions under a lock; all formatting happens at scrape time.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    # Counters and gauges are either updated in place or computed at scrape time by
+    # `collect() -> {label values: value}` (for state that is already tracked elsewhere)
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        if self.collect is not None:
+            items = list(self.collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket (non-cumulative) counts, sum, count
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+# --------------------------------------------------
+# ASGI MIDDLEWARE
+# --------------------------------------------------
+class RequestMetricsMiddleware:
+    # Times each HTTP request until its last body chunk is sent (so streamed exports
+    # count in full) and labels it with the route template, not the raw path, to keep
+    # /employee/{employee_id} one series
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - start, scope["method"], path, status[0])
@@ -0,0 +1,180 @@
+import json
+import os
+
+import numpy as np
+
+# --------------------------------------------------
+# FLATTENING
+# --------------------------------------------------
+# sklearn copies tree nodes into private buffers when unpickling, so every worker
+# holds its own copy of each model. Here the fitted models are flattened into plain
+# NumPy arrays that can be saved as .npy and memory-mapped: N workers then share one
+# physical copy through the page cache.
+MANIFEST_FILE = "manifest.json"
+
+def _flatten_trees(trees, leaf_value):
+    # Concatenates sklearn trees into one node table; child indices become global
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+        left.append(np.where(is_leaf, -1, t.children_left + offset))
+        right.append(np.where(is_leaf, -1, t.children_right + offset))
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        value.append(leaf_value(t))
+        roots.append(offset)
+        offset += t.node_count
+    return {
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+    }
+
+def _class_fraction(t):
+    # Positive-class share of each node, as DecisionTreeClassifier.predict_proba normalizes it
+    value = t.value[:, 0, :]
+    total = value.sum(axis=1)
+    total[total == 0] = 1
+    return value[:, 1] / total
+
+def flatten_model(model):
+    # Returns (kind, params, arrays) for a fitted model from backend/test2.ipynb
+    name = type(model).__name__
+    if name == "RandomForestClassifier":
+        return "forest", {}, _flatten_trees(model.estimators_, _class_fraction)
+    if name == "GradientBoostingClassifier":
+        init_raw = float(model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0])
+        params = {"learning_rate": float(model.learning_rate), "init_raw": init_raw}
+        return "boosting", params, _flatten_trees(model.estimators_[:, 0], lambda t: t.value[:, 0, 0])
+    if name == "Pipeline":
+        scaler, clf = model.steps[0][1], model.steps[-1][1]
+        arrays = {
+            "scale": np.asarray(scaler.scale_, dtype=np.float64),
+            "min": np.asarray(scaler.min_, dtype=np.float64),
+            "coef": np.asarray(clf.coef_[0], dtype=np.float64),
+            "intercept": np.asarray(clf.intercept_, dtype=np.float64),
+        }
+        return "linear", {}, arrays
+    raise ValueError(f"Cannot flatten {name}")
+
+# --------------------------------------------------
+# ARRAY MODELS
+# --------------------------------------------------
+def _expit(raw):
+    return 1.0 / (1.0 + np.exp(-raw))
+
+def tree_input(X) -> np.ndarray:
+    # sklearn trees compare float32 features against float64 thresholds
+    return np.asarray(X, dtype=np.float32)
+
+class ArrayModel:
+    # predict_proba over flattened arrays; a drop-in for the sklearn models in ScoringEngine
+    CHUNK_ROWS = 4096
+    takes_arrays = True
+
+    def __init__(self, kind: str, params: dict, arrays: dict):
+        self.kind = kind
+        self.params = params
+        self.arrays = arrays
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        # Walks every tree for every row one level at a time -> (rows, trees) leaf values
+        a = self.arrays
+        left, right, feature, threshold = a["left"], a["right"], a["feature"], a["threshold"]
+        X = tree_input(X)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.repeat(np.asarray(a["roots"])[np.newaxis, :], len(X), axis=0)
+        while True:
+            children = left[node]
+            active = children != -1
+            if not active.any():
+                break
+            go_left = X[rows, feature[node]] <= threshold[node]
+            node = np.where(active, np.where(go_left, children, right[node]), node)
+        return a["value"][node]
+
+    def _positive(self, X: np.ndarray) -> np.ndarray:
+        if self.kind == "linear":
+            a = self.arrays
+            scaled = X * a["scale"] + a["min"]
+            return _expit(scaled @ a["coef"] + a["intercept"][0])
+        leaves = self._leaf_values(X)
+        if self.kind == "forest":
+            return leaves.mean(axis=1)
+        return _expit(self.params["init_raw"] + self.params["learning_rate"] * leaves.sum(axis=1))
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        p = np.concatenate([self._positive(X[i:i + self.CHUNK_ROWS]) for i in range(0, len(X), self.CHUNK_ROWS)]) if len(X) else np.zeros(0)
+        return np.column_stack([1 - p, p])
+
+# --------------------------------------------------
+# STORE
+# --------------------------------------------------
+def export_store(models: dict, feature_columns, out_dir: str, artifacts_hash: str):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"artifacts_hash": artifacts_hash, "feature_columns": list(feature_columns), "models": {}}
+    for name, model in models.items():
+        kind, params, arrays = flatten_model(model)
+        for key, array in arrays.items():
+            np.save(os.path.join(out_dir, f"{name}.{key}.npy"), np.ascontiguousarray(array))
+        manifest["models"][name] = {"kind": kind, "params": params, "arrays": list(arrays)}
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_store(store_dir: str, artifacts_hash: str = None):
+    # Returns ({name: ArrayModel}, feature_columns) with every array memory-mapped read-only
+    with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if artifacts_hash is not None and manifest["artifacts_hash"] != artifacts_hash:
+        raise ValueError(f"Model store {store_dir} was exported from different artifacts")
+    models = {}
+    for name, spec in manifest["models"].items():
+        arrays = {key: np.load(os.path.join(store_dir, f"{name}.{key}.npy"), mmap_mode="r") for key in spec["arrays"]}
+        models[name] = ArrayModel(spec["kind"], spec["params"], arrays)
+    return models, manifest["feature_columns"]
+
+# --------------------------------------------------
+# MEMORY
+# --------------------------------------------------
+def process_memory():
+    # Resident memory in MB. On Linux RssFile is the page-cache share (memory-mapped
+    # models land there and are shared between workers) and RssAnon is private.
+    memory = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile", "RssShmem"):
+                    memory[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        try:
+            import resource
+        except ImportError:
+            return memory
+        # ru_maxrss is a peak, in kB on Linux and bytes on macOS
+        memory["MaxRSS"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return memory
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/ after retraining, with the same MODEL_DIR as the API:
+    #   python model_store.py [out_dir]
+    import sys
+    import joblib
+    from evaluation import MODEL_FILES, FEATURE_COLUMNS_FILE, artifact_paths, file_hash, resolve_model_dir
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "model_store"
+    model_dir = resolve_model_dir(os.getenv("MODEL_DIR", ""))
+    models = {name: joblib.load(os.path.join(model_dir, path)) for name, path in MODEL_FILES.items()}
+    feature_columns = joblib.load(os.path.join(model_dir, FEATURE_COLUMNS_FILE))
+    manifest = export_store(models, feature_columns, out_dir, file_hash(artifact_paths(model_dir)))
+    print(f"Exported {', '.join(manifest['models'])} from {model_dir or '.'} to {out_dir}")
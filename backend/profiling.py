@@ -0,0 +1,244 @@
+import asyncio
+import contextvars
+import functools
+import hmac
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+
+# --------------------------------------------------
+# SAMPLING PROFILER
+# --------------------------------------------------
+# A wall-clock sampler for a single request. Every `interval` seconds it records the
+# stack of each thread working on the request: the worker thread a sync endpoint runs
+# on, or the event loop while the request's task is running. While the task is
+# suspended (e.g. waiting on Gemini) the await chain is recorded instead, so time
+# spent waiting shows up under the call that waited. Stacks are written in the
+# folded format ("outer;inner;leaf count") read by flamegraph.pl and speedscope.
+_session = contextvars.ContextVar("profile_session", default=None)
+_ids = itertools.count(1)
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _running_stack(frame, root=None) -> list:
+    # Outermost first; stops at `root` when given
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        if frame is root:
+            break
+        frame = frame.f_back
+    return stack[::-1]
+
+def _await_chain(coro) -> list:
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            stack.append(f"[await {type(coro).__name__}]")
+            break
+        stack.append(_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+class ProfileSession:
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{os.getpid()}-{next(_ids)}"
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.stacks = {}     # folded stack -> samples
+        self.workers = {}    # thread ident -> nesting depth
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profile-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Sampling ends before the join, so the profiler's own shutdown isn't recorded
+        self._done.set()
+        self.duration = time.perf_counter() - self.started
+        self._thread.join()
+
+    def enter(self, ident: int):
+        with self._lock:
+            self.workers[ident] = self.workers.get(ident, 0) + 1
+
+    def leave(self, ident: int):
+        with self._lock:
+            self.workers[ident] -= 1
+            if not self.workers[ident]:
+                del self.workers[ident]
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            workers = list(self.workers)
+        stacks = []
+        if workers:
+            # The task is only waiting on its worker threads; sample those
+            stacks = [[_label(f) for f in _running_stack(frames[i])] for i in workers if i in frames]
+        elif self.task is not None and not self.task.done():
+            root = self.task.get_coro()
+            root_frame = getattr(root, "cr_frame", None)
+            running = _running_stack(frames.get(self.loop_thread), root_frame)
+            if root_frame is not None and running and running[0] is root_frame:
+                stacks = [[_label(f) for f in running]]
+            else:
+                stacks = [_await_chain(root)]
+        if self._done.is_set():
+            # stop() was called while this sample was being taken
+            return
+        for stack in stacks:
+            key = ";".join(stack)
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+# --------------------------------------------------
+# PROFILE STORE
+# --------------------------------------------------
+class ProfileStore:
+    # <id>.folded holds the stacks, <id>.json what was profiled; only the newest
+    # `keep` profiles are kept
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, session: ProfileSession, status: int) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {
+            "id": session.id, "method": session.method, "path": session.path, "status": status,
+            "duration_ms": round(session.duration * 1000, 3), "samples": session.samples,
+            "interval_ms": session.interval * 1000, "created": time.time(),
+        }
+        with open(os.path.join(self.directory, f"{session.id}.folded"), "w") as f:
+            f.write(session.folded())
+        with open(os.path.join(self.directory, f"{session.id}.json"), "w") as f:
+            json.dump(meta, f)
+        self._prune()
+        return meta
+
+    def _ids(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        metas = [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")]
+        return sorted(metas, key=lambda i: os.path.getmtime(os.path.join(self.directory, f"{i}.json")), reverse=True)
+
+    def _prune(self):
+        for profile_id in self._ids()[self.keep:]:
+            for ext in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + ext))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self, limit: int) -> list:
+        out = []
+        for profile_id in self._ids()[:limit]:
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    out.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def folded_path(self, profile_id: str):
+        # Ids come from the URL, so only names this store wrote are accepted
+        if profile_id not in self._ids():
+            return None
+        return os.path.join(self.directory, f"{profile_id}.folded")
+
+# --------------------------------------------------
+# REQUEST HOOKS
+# --------------------------------------------------
+def authorized(token: str, header_value, query_string: bytes) -> bool:
+    # A request asks for profiling with `X-Profile: <token>` or `?profile=<token>`
+    if not token:
+        return False
+    candidates = [header_value] if header_value else []
+    if b"profile=" in query_string:
+        candidates += parse_qs(query_string.decode("latin-1")).get("profile", [])
+    return any(hmac.compare_digest(c.encode(), token.encode()) for c in candidates)
+
+class ProfilingMiddleware:
+    # Only installed when a token is configured; unprofiled requests pay one header scan.
+    # Paths under `exclude` are never profiled: the token also authorizes reading
+    # profiles, and those reads must not record (and prune) profiles of their own.
+    def __init__(self, app, token: str, store: ProfileStore, interval: float, exclude=()):
+        self.app = app
+        self.token = token
+        self.store = store
+        self.interval = interval
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            return await self.app(scope, receive, send)
+        header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-profile"), None)
+        if not authorized(self.token, header, scope.get("query_string", b"")):
+            return await self.app(scope, receive, send)
+
+        session = ProfileSession(scope["method"], scope["path"], self.interval)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]}
+            await send(message)
+
+        reset = _session.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session.stop()
+            _session.reset(reset)
+            self.store.save(session, status[0])
+
+def _track_thread(call):
+    # Sync endpoints run in the threadpool with a copy of the request's context, so
+    # the session is visible there and can start sampling that thread
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return call(*args, **kwargs)
+        ident = threading.get_ident()
+        session.enter(ident)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            session.leave(ident)
+    wrapper.profiled = True
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    # Route class that lets a profile session follow sync endpoints into the threadpool
+    def get_route_handler(self):
+        call = self.dependant.call
+        if not inspect.iscoroutinefunction(call) and not getattr(call, "profiled", False):
+            self.dependant.call = _track_thread(call)
+        return super().get_route_handler()
@@ -0,0 +1,294 @@
+import heapq
+import time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# ENCODING
+# --------------------------------------------------
+CATEGORICAL_COLUMNS = ["BusinessTravel", "Department", "EducationField", "Gender", "JobRole", "MaritalStatus", "OverTime"]
+
+class FeatureEncoder:
+    # Same result as pd.get_dummies(...).reindex(columns=feature_columns, fill_value=0),
+    # but the column layout is resolved once instead of on every call.
+    def __init__(self, feature_columns, categorical_columns=CATEGORICAL_COLUMNS):
+        self.feature_columns = list(feature_columns)
+        self.position = {col: i for i, col in enumerate(self.feature_columns)}
+        self.categorical = {}
+        for col in categorical_columns:
+            prefix = f"{col}_"
+            levels = {c[len(prefix):]: i for c, i in self.position.items() if c.startswith(prefix)}
+            self.categorical[col] = levels
+        dummy_positions = {i for levels in self.categorical.values() for i in levels.values()}
+        self.numeric = {c: i for c, i in self.position.items() if i not in dummy_positions}
+        # Raw dataset columns the encoding reads
+        self.source_columns = list(self.numeric) + list(self.categorical)
+
+    def encode_frame(self, data: pd.DataFrame) -> np.ndarray:
+        X = np.zeros((len(data), len(self.feature_columns)), dtype=np.float64)
+        for col, pos in self.numeric.items():
+            if col in data:
+                X[:, pos] = data[col].to_numpy(dtype=np.float64)
+        for col, levels in self.categorical.items():
+            if col in data:
+                values = data[col].to_numpy()
+                for level, pos in levels.items():
+                    X[:, pos] = values == level
+        return X
+
+    def encode_record(self, record: dict) -> np.ndarray:
+        # One raw record (e.g. a form payload) as an encoded row; absent fields stay 0
+        return self.apply(np.zeros(len(self.feature_columns)), record)
+
+    def encode_values(self, feature: str, values: list):
+        # Encoded columns a raw feature maps to, and their values for each raw value;
+        # None if the feature is not a model input
+        if feature in self.numeric:
+            column = []
+            for v in values:
+                try:
+                    column.append(float(v))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid value for {feature}: {v!r}")
+            return [self.numeric[feature]], np.array(column, dtype=np.float64).reshape(len(values), 1)
+        if feature in self.categorical:
+            levels = self.categorical[feature]
+            block = np.array([[v == level for level in levels] for v in values], dtype=np.float64)
+            return list(levels.values()), block.reshape(len(values), len(levels))
+        return None
+
+    def apply(self, vector: np.ndarray, changes: dict) -> np.ndarray:
+        # Returns a copy of an encoded row with raw feature edits (e.g. what-if values) applied
+        vector = vector.copy()
+        for feature, value in changes.items():
+            encoded = self.encode_values(feature, [value])
+            if encoded is not None:
+                cols, block = encoded
+                vector[cols] = block[0]
+        return vector
+
+    def grid(self, vector: np.ndarray, axes: list) -> np.ndarray:
+        # Every combination of the (feature, values) axes laid over one encoded row,
+        # in row-major order of the axes
+        shape = [len(values) for _, values in axes]
+        X = np.repeat(vector[np.newaxis, :], int(np.prod(shape)), axis=0)
+        idx = np.indices(shape).reshape(len(shape), -1)
+        for (feature, values), axis_idx in zip(axes, idx):
+            encoded = self.encode_values(feature, values)
+            if encoded is None:
+                raise ValueError(f"Unknown feature: {feature}")
+            cols, block = encoded
+            X[:, cols] = block[axis_idx]
+        return X
+
+# --------------------------------------------------
+# RISK HELPERS
+# --------------------------------------------------
+def risk_level(prob):
+    return "High" if prob >= 0.7 else "Medium" if prob >= 0.4 else "Low"
+
+def risk_levels(probs: np.ndarray) -> np.ndarray:
+    return np.select([probs >= 0.7, probs >= 0.4], ["High", "Medium"], default="Low")
+
+# --------------------------------------------------
+# INFERENCE TIMING
+# --------------------------------------------------
+# Optional observer(model_name, seconds, rows) called after every model call;
+# "ensemble" is reported in addition to its members
+_inference_observer = None
+
+def set_inference_observer(observer):
+    global _inference_observer
+    _inference_observer = observer
+
+# --------------------------------------------------
+# LEADERBOARD
+# --------------------------------------------------
+class Leaderboard:
+    # Employees ranked by risk once per model. Each Department x JobRole cell keeps
+    # its members' ranks in ascending order, so filtered pages are a k-way merge.
+    def __init__(self, probs: np.ndarray, departments: np.ndarray, job_roles: np.ndarray):
+        # Stable sort on the rounded percentage keeps ties in dataset order
+        self.order = np.argsort(-np.round(probs * 100, 2), kind="stable")
+        cells = pd.MultiIndex.from_arrays([departments[self.order], job_roles[self.order]])
+        cell_codes, uniques = pd.factorize(cells)
+        self.cell_departments = uniques.get_level_values(0).to_numpy()
+        self.cell_roles = uniques.get_level_values(1).to_numpy()
+        by_cell = np.argsort(cell_codes, kind="stable")
+        bounds = np.cumsum(np.bincount(cell_codes, minlength=len(uniques)))[:-1]
+        self.cell_ranks = np.split(by_cell, bounds)
+
+    def query(self, limit: int, offset: int = 0, departments=None, job_roles=None):
+        # Returns (row positions for the page, number of matching employees)
+        if not departments and not job_roles:
+            return self.order[offset:offset + limit], len(self.order)
+        selected = np.ones(len(self.cell_ranks), dtype=bool)
+        if departments:
+            selected &= np.isin(self.cell_departments, departments)
+        if job_roles:
+            selected &= np.isin(self.cell_roles, job_roles)
+        groups = [self.cell_ranks[i] for i in np.flatnonzero(selected)]
+        ranks = list(islice(heapq.merge(*groups), offset, offset + limit))
+        return self.order[np.array(ranks, dtype=np.int64)], sum(len(g) for g in groups)
+
+# --------------------------------------------------
+# MODEL SCORING
+# --------------------------------------------------
+class ModelScorer:
+    # Encoder plus models, with no population attached; the API's ScoringEngine and
+    # the Streamlit app both score through this, so they always agree.
+    def __init__(self, models: dict, feature_columns):
+        self.models = models
+        self.encoder = FeatureEncoder(feature_columns)
+
+    def _model_input(self, model, X: np.ndarray):
+        # sklearn models get a frame so they see the feature names they were fitted
+        # with; array-backed models (model store, compiled trees) take X directly
+        if getattr(model, "takes_arrays", False):
+            return X
+        return pd.DataFrame(X, columns=self.encoder.feature_columns, copy=False)
+
+    def _predict_model(self, name: str, X: np.ndarray) -> np.ndarray:
+        model = self.models[name]
+        if _inference_observer is None:
+            return model.predict_proba(self._model_input(model, X))[:, 1]
+        start = time.perf_counter()
+        probs = model.predict_proba(self._model_input(model, X))[:, 1]
+        _inference_observer(name, time.perf_counter() - start, len(X))
+        return probs
+
+    def predict(self, X: np.ndarray, model_name: str) -> np.ndarray:
+        if model_name != "ensemble":
+            return self._predict_model(model_name, X)
+        start = time.perf_counter()
+        probs = np.mean([self._predict_model(name, X) for name in self.models], axis=0)
+        if _inference_observer is not None:
+            _inference_observer("ensemble", time.perf_counter() - start, len(X))
+        return probs
+
+    def predict_record(self, record: dict, model_name: str) -> float:
+        return float(self.predict(self.encoder.encode_record(record)[np.newaxis, :], model_name)[0])
+
+# --------------------------------------------------
+# POPULATION SCORING
+# --------------------------------------------------
+class ScoringEngine(ModelScorer):
+    # Holds the encoded population and one cached score vector per model,
+    # so every consumer reads the same batch-scored probabilities.
+    def __init__(self, data: pd.DataFrame, models: dict, feature_columns, X=None, scores=None, sharded=None):
+        super().__init__(models, feature_columns)
+        self.data = data
+        # Optional sharding.ShardedScorer used for population-sized batches
+        self.sharded = sharded
+        # Row-major so a single employee's features are one contiguous slice
+        self.X = np.ascontiguousarray(self.encoder.encode_frame(data) if X is None else X)
+        self._scores = dict(scores or {})
+        self._leaderboards = {}
+
+        # EmployeeNumber -> row position; first occurrence wins, like df[df[...] == id].iloc[0]
+        self.index = {}
+        for pos, employee_id in enumerate(data["EmployeeNumber"].tolist()):
+            self.index.setdefault(employee_id, pos)
+
+    def position(self, employee_id: int):
+        return self.index.get(employee_id)
+
+    def feature_vector(self, pos: int, what_if: dict = None) -> np.ndarray:
+        if what_if:
+            return self.encoder.apply(self.X[pos], what_if)
+        return self.X[pos].copy()
+
+    def predict_rows(self, X: np.ndarray, model_keys: list) -> np.ndarray:
+        # Scores rows that each name their own model (or "ensemble") with one
+        # predict_proba call per model over every row that needs it
+        keys = np.asarray(model_keys)
+        ensemble = keys == "ensemble"
+        probs = np.zeros(len(keys))
+        for name in self.models:
+            own = keys == name
+            needed = own | ensemble
+            if not needed.any():
+                continue
+            p = np.zeros(len(keys))
+            p[needed] = self.predict(X[needed], name)
+            probs[own] = p[own]
+            probs[ensemble] += p[ensemble] / len(self.models)
+        return probs
+
+    def predict_models(self, X: np.ndarray, model_names) -> dict:
+        # Every model in model_names over X. With a sharded scorer attached and enough
+        # rows, models and row shards run concurrently in its worker processes.
+        if self.sharded is None or len(X) < self.sharded.min_rows:
+            return {name: self.predict(X, name) for name in model_names}
+        probs, seconds = self.sharded.score(X, model_names)
+        if _inference_observer is not None:
+            for name in model_names:
+                _inference_observer(name, seconds[name], len(X))
+        return probs
+
+    def score_models(self, model_names):
+        # Fills the score cache for every model not yet scored, in one batch
+        missing = [name for name in model_names if name not in self._scores]
+        if missing:
+            self._scores.update(self.predict_models(self.X, missing))
+
+    def scores(self, model_name: str) -> np.ndarray:
+        if model_name not in self._scores:
+            if model_name == "ensemble":
+                self.score_models(list(self.models))
+                self._scores[model_name] = np.mean([self._scores[name] for name in self.models], axis=0)
+            else:
+                self.score_models([model_name])
+        return self._scores[model_name]
+
+    def leaderboard(self, model_name: str) -> Leaderboard:
+        if model_name not in self._leaderboards:
+            self._leaderboards[model_name] = Leaderboard(
+                self.scores(model_name), self.data["Department"].to_numpy(), self.data["JobRole"].to_numpy()
+            )
+        return self._leaderboards[model_name]
+
+    def refresh(self, data: pd.DataFrame):
+        # Engine for a new extract that reuses encoded rows and scores of employees
+        # whose raw row is unchanged, matched by EmployeeNumber. Returns (engine, summary).
+        old_pos = data["EmployeeNumber"].map(self.index)
+        matched = old_pos.notna().to_numpy()
+        old_pos = old_pos.fillna(-1).to_numpy(dtype=np.int64)
+
+        unchanged = np.zeros(len(data), dtype=bool)
+        if matched.any() and list(data.columns) == list(self.data.columns):
+            new_rows = data[matched].reset_index(drop=True)
+            old_rows = self.data.iloc[old_pos[matched]].reset_index(drop=True)
+            # Categoricals from two extracts can have different categories and won't compare
+            categorical = [c for c in data.columns if isinstance(new_rows[c].dtype, pd.CategoricalDtype) or isinstance(old_rows[c].dtype, pd.CategoricalDtype)]
+            if categorical:
+                new_rows[categorical] = new_rows[categorical].astype(object)
+                old_rows[categorical] = old_rows[categorical].astype(object)
+            same = (new_rows == old_rows) | (new_rows.isna() & old_rows.isna())
+            unchanged[matched] = same.all(axis=1).to_numpy()
+        stale = ~unchanged
+
+        X = np.empty((len(data), len(self.encoder.feature_columns)), dtype=np.float64)
+        X[unchanged] = self.X[old_pos[unchanged]]
+        X[stale] = self.encoder.encode_frame(data[stale])
+
+        scores = {}
+        scored = [name for name in self._scores if name != "ensemble"]
+        rescored = self.predict_models(X[stale], scored) if stale.any() else {}
+        for name in scored:
+            new_scores = np.empty(len(data), dtype=np.float64)
+            new_scores[unchanged] = self._scores[name][old_pos[unchanged]]
+            if stale.any():
+                new_scores[stale] = rescored[name]
+            scores[name] = new_scores
+
+        summary = {
+            "rows": len(data),
+            "added": int((~matched).sum()),
+            "changed": int((matched & stale).sum()),
+            "removed": int((~np.isin(list(self.index), data["EmployeeNumber"].to_numpy())).sum()),
+            "rescored": int(stale.sum()),
+        }
+        return ScoringEngine(data, self.models, self.encoder.feature_columns, X=X, scores=scores, sharded=self.sharded), summary
@@ -0,0 +1,115 @@
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# --------------------------------------------------
+# SHARDED SCORING
+# --------------------------------------------------
+# Scores a whole population on a process pool. The encoded matrix is copied once
+# into shared memory and every task names a (model, row range) slice of it, so
+# workers read their shard in place instead of receiving it pickled; they write
+# probabilities into a shared (models x rows) output block the same way. Tasks for
+# all requested models are queued together, so the ensemble's members run side by
+# side rather than one after another.
+SHARD_ROWS = 50_000
+
+_scorer = None
+
+def _init_worker(models: dict, feature_columns):
+    global _scorer
+    from scoring import ModelScorer
+    # One process per core already; forests trained with n_jobs=-1 would oversubscribe
+    for model in models.values():
+        if getattr(model, "n_jobs", None) not in (None, 1):
+            model.n_jobs = 1
+    _scorer = ModelScorer(models, feature_columns)
+
+def _attach(name: str):
+    # Workers share the parent's resource tracker, so attaching (which registers the
+    # block again) is harmless, and the parent's unlink clears it
+    return shared_memory.SharedMemory(name=name)
+
+def _score_shard(x_name: str, x_shape: tuple, out_name: str, out_shape: tuple, slot: int, model_name: str, start: int, stop: int) -> float:
+    x_block, out_block = _attach(x_name), _attach(out_name)
+    try:
+        X = np.ndarray(x_shape, dtype=np.float64, buffer=x_block.buf)
+        out = np.ndarray(out_shape, dtype=np.float64, buffer=out_block.buf)
+        began = time.perf_counter()
+        out[slot, start:stop] = _scorer.predict(X[start:stop], model_name)
+        seconds = time.perf_counter() - began
+        del X, out
+        return seconds
+    finally:
+        x_block.close()
+        out_block.close()
+
+class ShardedScorer:
+    # The pool starts on first use. Workers get their own copy of the models once, at
+    # startup (forkserver, so an API process with live threads is never forked).
+    def __init__(self, models: dict, feature_columns, workers: int, shard_rows: int = SHARD_ROWS, min_rows: int = None):
+        self.models = models
+        self.feature_columns = list(feature_columns)
+        self.workers = workers
+        self.shard_rows = shard_rows
+        # Below this many rows the pool's overhead outweighs the parallelism
+        self.min_rows = shard_rows if min_rows is None else min_rows
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=mp.get_context(method),
+                initializer=_init_worker, initargs=(self.models, self.feature_columns),
+            )
+        return self._pool
+
+    def start(self):
+        # Spawns the workers and loads their models ahead of the first real batch
+        pool = self._executor()
+        for future in [pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def score(self, X: np.ndarray, model_names) -> tuple:
+        # Returns ({model: probabilities}, {model: seconds spent in predict_proba summed over shards})
+        model_names = list(model_names)
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n = len(X)
+        if n == 0:
+            return {name: np.empty(0) for name in model_names}, {name: 0.0 for name in model_names}
+        out_shape = (len(model_names), n)
+        x_block = shared_memory.SharedMemory(create=True, size=X.nbytes)
+        out_block = shared_memory.SharedMemory(create=True, size=8 * out_shape[0] * out_shape[1])
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=x_block.buf)[:] = X
+            pool = self._executor()
+            tasks = [
+                (name, pool.submit(_score_shard, x_block.name, X.shape, out_block.name, out_shape, slot, name, start, min(start + self.shard_rows, n)))
+                for start in range(0, n, self.shard_rows)
+                for slot, name in enumerate(model_names)
+            ]
+            seconds = dict.fromkeys(model_names, 0.0)
+            for name, task in tasks:
+                seconds[name] += task.result()
+            out = np.ndarray(out_shape, dtype=np.float64, buffer=out_block.buf).copy()
+            return {name: out[slot] for slot, name in enumerate(model_names)}, seconds
+        finally:
+            x_block.close()
+            x_block.unlink()
+            out_block.close()
+            out_block.unlink()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+def parse_workers(value: str) -> int:
+    # "auto" = one worker per core; 0 disables sharded scoring
+    if value == "auto":
+        return os.cpu_count() or 1
+    return int(value)
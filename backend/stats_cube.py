@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# BANDS
+# --------------------------------------------------
+TENURE_BINS = [0, 2, 5, 10, 40]
+TENURE_LABELS = ["0–2", "2–5", "5–10", "10+"]
+INCOME_LABELS = ["Low", "Medium", "High", "Very High"]
+NEVER_SEEN = np.iinfo(np.int64).max
+
+BREAKDOWNS = {
+    "attrition_by_department": "Department",
+    "attrition_by_job_role": "JobRole",
+    "attrition_by_job_level": "JobLevel",
+    "attrition_by_overtime": "OverTime",
+    "attrition_by_job_satisfaction": "JobSatisfaction",
+    "attrition_by_worklife_balance": "WorkLifeBalance",
+}
+
+def _lerp(a, b, t):
+    # Same arithmetic as numpy's linear quantile, so band edges match pd.qcut exactly
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+def weighted_quantiles(values: np.ndarray, counts: np.ndarray, qs) -> np.ndarray:
+    # Linear-interpolated quantiles of the sample where values[i] occurs counts[i] times
+    n = counts.sum()
+    cum = np.cumsum(counts)
+    edges = []
+    for q in qs:
+        virtual = n * q + (1 + q * -1) - 1
+        lo = np.floor(virtual)
+        lo_idx = int(np.clip(lo, 0, n - 1))
+        hi_idx = int(np.clip(lo + 1, 0, n - 1))
+        a = values[np.searchsorted(cum, lo_idx, side="right")]
+        b = values[np.searchsorted(cum, hi_idx, side="right")]
+        edges.append(_lerp(a, b, virtual - lo))
+    return np.array(edges, dtype=np.float64)
+
+# --------------------------------------------------
+# CUBE
+# --------------------------------------------------
+class AttritionCube:
+    # Attrition counts pre-aggregated per Department x JobRole cell and breakdown value.
+    # A filter only selects cells, so /stats never touches the row-level data.
+    def __init__(self, data: pd.DataFrame):
+        cells = pd.MultiIndex.from_frame(data[["Department", "JobRole"]])
+        cell_codes, uniques = pd.factorize(cells)
+        self.cell_departments = uniques.get_level_values(0).to_numpy()
+        self.cell_roles = uniques.get_level_values(1).to_numpy()
+        n_cells = len(uniques)
+
+        attrited = (data["Attrition"] == "Yes").to_numpy()
+        self.totals = np.bincount(cell_codes, minlength=n_cells)
+        self.attrited = np.bincount(cell_codes[attrited], minlength=n_cells)
+        self.satisfaction_sums = np.bincount(cell_codes, weights=data["EnvironmentSatisfaction"].to_numpy(dtype=np.float64), minlength=n_cells)
+
+        # Attrited counts per cell for every breakdown value, plus the row where each
+        # value first appears among attrited rows (value_counts orders ties that way)
+        self.breakdowns = {}
+        rows = np.arange(len(data))
+        for key, col in BREAKDOWNS.items():
+            level_codes, levels = pd.factorize(data[col])
+            counts = self._count(cell_codes, level_codes, attrited, n_cells, len(levels))
+            first_seen = np.full((n_cells, len(levels)), NEVER_SEEN, dtype=np.int64)
+            keep = attrited & (level_codes >= 0)
+            np.minimum.at(first_seen, (cell_codes[keep], level_codes[keep]), rows[keep])
+            self.breakdowns[key] = (levels.tolist(), counts, first_seen)
+
+        # Tenure bands are fixed, so they can be binned once; like pd.cut, 0 years falls outside the bins
+        tenure = pd.cut(data["YearsAtCompany"], bins=TENURE_BINS, labels=TENURE_LABELS)
+        self.tenure = self._count(cell_codes, tenure.cat.codes.to_numpy(), attrited, n_cells, len(TENURE_LABELS))
+
+        # Income bands are quartiles of the *filtered* population, so keep a per-cell income histogram
+        income_codes, self.income_levels = pd.factorize(data["MonthlyIncome"], sort=True)
+        self.income_levels = np.asarray(self.income_levels, dtype=np.float64)
+        everyone = np.ones(len(data), dtype=bool)
+        self.income_totals = self._count(cell_codes, income_codes, everyone, n_cells, len(self.income_levels))
+        self.income_attrited = self._count(cell_codes, income_codes, attrited, n_cells, len(self.income_levels))
+
+    @staticmethod
+    def _count(cell_codes, level_codes, mask, n_cells, n_levels):
+        keep = mask & (level_codes >= 0)
+        flat = cell_codes[keep] * n_levels + level_codes[keep]
+        return np.bincount(flat, minlength=n_cells * n_levels).reshape(n_cells, n_levels)
+
+    def _select(self, departments, job_roles):
+        selected = np.ones(len(self.totals), dtype=bool)
+        if departments:
+            selected &= np.isin(self.cell_departments, departments)
+        if job_roles:
+            selected &= np.isin(self.cell_roles, job_roles)
+        return selected
+
+    @staticmethod
+    def _records(levels, counts, first_seen=None, keep_empty=False):
+        # Same shape and ordering as value_counts().reset_index().to_dict("records")
+        if first_seen is None:
+            order = np.argsort(-counts, kind="stable")
+        else:
+            order = np.lexsort((first_seen, -counts))
+        return [{"value": levels[i], "count": int(counts[i])} for i in order if keep_empty or counts[i]]
+
+    def _income_bands(self, selected):
+        totals = self.income_totals[selected].sum(axis=0)
+        attrited = self.income_attrited[selected].sum(axis=0)
+        present = totals > 0
+        if not present.any():
+            return self._records(INCOME_LABELS, np.zeros(len(INCOME_LABELS), dtype=np.int64), keep_empty=True)
+
+        values = self.income_levels[present]
+        edges = weighted_quantiles(values, totals[present], [0, 0.25, 0.5, 0.75, 1])
+        # pd.qcut would reject repeated edges; drop them and the trailing labels instead
+        edges = np.unique(edges)
+        labels = INCOME_LABELS[:max(len(edges) - 1, 1)]
+        bands = np.searchsorted(edges, values, side="left")
+        bands[values == edges[0]] = 1
+        counts = np.bincount(bands - 1, weights=attrited[present], minlength=len(labels)).astype(np.int64)
+        return self._records(labels, counts[:len(labels)], keep_empty=True)
+
+    def query(self, departments=None, job_roles=None):
+        selected = self._select(departments, job_roles)
+        total_employees = int(self.totals[selected].sum())
+        attrition_count = int(self.attrited[selected].sum())
+        satisfaction = self.satisfaction_sums[selected].sum() / total_employees if total_employees else 0
+
+        result = {
+            "kpis": {
+                "total_employees": total_employees,
+                "attrition_rate": round((attrition_count / total_employees) * 100, 2) if total_employees else 0,
+                "avg_satisfaction": round(float(satisfaction), 2),
+                "high_risk_employees": attrition_count,
+            },
+        }
+        for key, (levels, counts, first_seen) in self.breakdowns.items():
+            result[key] = self._records(levels, counts[selected].sum(axis=0), first_seen[selected].min(axis=0, initial=NEVER_SEEN))
+        result["attrition_by_tenure"] = self._records(TENURE_LABELS, self.tenure[selected].sum(axis=0), keep_empty=True)
+        result["attrition_by_income_band"] = self._income_bands(selected)
+        return result
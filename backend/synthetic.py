@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# GENERATION MODEL
+# --------------------------------------------------
+# Each block of columns is drawn jointly, as a whole row of the source extract taken
+# from the rows that share the block's parent values. Joint draws keep the
+# constraints between columns (YearsAtCompany <= TotalWorkingYears, StockOptionLevel
+# 0 for singles, ...). Parents give the conditional structure: Department ->
+# JobRole -> JobLevel -> tenure and pay. Columns in no block are drawn from their
+# own marginal distribution.
+# (columns, parents, jitter): jitter is a relative +/- spread for continuous columns
+BLOCKS = [
+    (("Department",), (), 0.0),
+    (("JobRole",), ("Department",), 0.0),
+    (("JobLevel",), ("JobRole",), 0.0),
+    (("Age", "TotalWorkingYears", "NumCompaniesWorked", "YearsAtCompany", "YearsInCurrentRole",
+      "YearsSinceLastPromotion", "YearsWithCurrManager"), ("JobLevel",), 0.0),
+    (("MonthlyIncome",), ("JobLevel",), 0.05),
+    (("EducationField",), ("Department",), 0.0),
+    (("MaritalStatus", "StockOptionLevel"), (), 0.0),
+    (("PercentSalaryHike", "PerformanceRating"), (), 0.0),
+    (("OverTime",), (), 0.0),
+    (("Attrition",), ("OverTime", "JobLevel"), 0.0),
+]
+ID_COLUMN = "EmployeeNumber"
+CHUNK_ROWS = 100_000
+
+class WorkforceModel:
+    def __init__(self, data: pd.DataFrame, blocks=BLOCKS):
+        self.columns = list(data.columns)
+        self.dtypes = data.dtypes.to_dict()
+        covered = {c for columns, _, _ in blocks for c in columns}
+        self.blocks = [b for b in blocks if all(c in data for c in b[0] + b[1])]
+        self.blocks += [((c,), (), 0.0) for c in self.columns if c not in covered and c != ID_COLUMN]
+
+        self.values = {}     # column -> source values
+        self.groups = {}     # block index -> {parent values: source row positions}
+        self.bounds = {}     # jittered column -> (min, max)
+        for i, (columns, parents, jitter) in enumerate(self.blocks):
+            for c in columns:
+                self.values[c] = data[c].to_numpy()
+                if jitter:
+                    self.bounds[c] = (data[c].min(), data[c].max())
+            if parents:
+                self.groups[i] = {
+                    key if isinstance(key, tuple) else (key,): positions
+                    for key, positions in data.groupby(list(parents), sort=False, observed=True).indices.items()
+                }
+
+    def _sample_rows(self, i: int, out: dict, n: int, rng) -> np.ndarray:
+        # Source row positions for block i, drawn within each row's parent group
+        parents = self.blocks[i][1]
+        n_source = len(next(iter(self.values.values())))
+        if not parents:
+            return rng.integers(n_source, size=n)
+        rows = rng.integers(n_source, size=n)  # fallback for parent combos never seen together
+        keys = pd.MultiIndex.from_arrays([out[p] for p in parents])
+        codes, uniques = pd.factorize(keys)
+        for code, key in enumerate(uniques):
+            positions = self.groups[i].get(key if isinstance(key, tuple) else (key,))
+            if positions is None:
+                continue
+            members = np.flatnonzero(codes == code)
+            rows[members] = positions[rng.integers(len(positions), size=len(members))]
+        return rows
+
+    def sample(self, n: int, rng, first_id: int = 1) -> pd.DataFrame:
+        out = {}
+        for i, (columns, _, jitter) in enumerate(self.blocks):
+            rows = self._sample_rows(i, out, n, rng)
+            for c in columns:
+                values = self.values[c][rows]
+                if jitter:
+                    low, high = self.bounds[c]
+                    values = values * (1 + rng.uniform(-jitter, jitter, size=n))
+                    values = np.clip(np.rint(values), low, high).astype(self.values[c].dtype)
+                out[c] = values
+        if ID_COLUMN in self.columns:
+            out[ID_COLUMN] = np.arange(first_id, first_id + n, dtype=np.int64)
+        return pd.DataFrame({c: out[c] for c in self.columns}).astype(self.dtypes)
+
+    def generate(self, n: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS):
+        # Yields frames of at most chunk_rows rows; the same (seed, chunk_rows) always
+        # gives the same rows, and only one chunk is in memory at a time
+        for index, start in enumerate(range(0, n, chunk_rows)):
+            rng = np.random.default_rng([seed, index])
+            yield self.sample(min(chunk_rows, n - start), rng, first_id=start + 1)
+
+# --------------------------------------------------
+# OUTPUT
+# --------------------------------------------------
+def write_dataset(model: WorkforceModel, path: str, n: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> int:
+    # CSV is appended chunk by chunk; Parquet (needs pyarrow) is written one row group per chunk
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in model.generate(n, seed, chunk_rows):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return n
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(model.generate(n, seed, chunk_rows)):
+            chunk.to_csv(f, header=i == 0, index=False)
+    return n
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python synthetic.py ROWS OUT.csv|OUT.parquet [--seed N] [--source path/to/dataset.csv]
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic workforce shaped like the HR extract")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default="WA_Fn-UseC_-HR-Employee-Attrition.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = WorkforceModel(pd.read_csv(args.source))
+    write_dataset(model, args.out, args.rows, args.seed, args.chunk_rows)
+    print(f"Wrote {args.rows} rows to {args.out} in {time.perf_counter() - start:.1f}s")
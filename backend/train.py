@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from evaluation import MODEL_FILES, FEATURE_COLUMNS_FILE, ARTIFACT_FILES, TRAINING_MANIFEST, file_hash, load_training_manifest, replaced_atomically
+
+# --------------------------------------------------
+# DESIGN MATRIX
+# --------------------------------------------------
+# Same preparation as test2.ipynb: drop the constant and ID columns, one-hot encode
+# the text columns with drop_first, stratified 80/20 holdout and 5-fold CV, seed 42.
+DROP_COLUMNS = ["EmployeeNumber", "EmployeeCount", "Over18", "StandardHours"]
+SEED = 42
+CV_FOLDS = 5
+TEST_SIZE = 0.2
+RISK_THRESHOLD = 0.4
+SWEEP_THRESHOLDS = [0.3, 0.4, 0.5, 0.6]
+
+def design_matrix(data: pd.DataFrame):
+    y = data["Attrition"].map({"Yes": 1, "No": 0})
+    X = data.drop(columns=DROP_COLUMNS + ["Attrition"], errors="ignore")
+    cat_cols = X.select_dtypes(include=["object", "string"]).columns.tolist()
+    return pd.get_dummies(X, columns=cat_cols, drop_first=True), y
+
+def split_indices(y: np.ndarray, seed: int, folds: int, test_size: float):
+    # (holdout train rows, holdout test rows, CV fold number of every row); the holdout
+    # rows keep train_test_split's order so fits match the notebook's exactly
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+
+    rows = np.arange(len(y))
+    train_idx, test_idx = train_test_split(rows, test_size=test_size, stratify=y, random_state=seed)
+    fold_of = np.empty(len(y), dtype=np.int8)
+    for fold, (_, fold_test) in enumerate(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(rows, y)):
+        fold_of[fold_test] = fold
+    return train_idx, test_idx, fold_of
+
+def load_design(data_path: str, cache_dir: str, seed: int = SEED, folds: int = CV_FOLDS, test_size: float = TEST_SIZE):
+    # Encoding and fold assignment are cached per (extract hash, seed, folds, test size),
+    # so reruns on the same extract skip straight to fitting
+    data_hash = file_hash([data_path])
+    path = os.path.join(cache_dir, f"design-{data_hash[:16]}-s{seed}-k{folds}-t{test_size}.npz")
+    if os.path.exists(path):
+        cached = np.load(path, allow_pickle=False)
+        X = pd.DataFrame(cached["X"], columns=cached["columns"].tolist())
+        return X, cached["y"], cached["train_idx"], cached["test_idx"], cached["fold_of"], data_hash, True
+
+    X, y = design_matrix(pd.read_csv(data_path))
+    y = y.to_numpy()
+    train_idx, test_idx, fold_of = split_indices(y, seed, folds, test_size)
+    os.makedirs(cache_dir, exist_ok=True)
+    with replaced_atomically(path, ".npz") as tmp_path:
+        np.savez(tmp_path, X=X.to_numpy(dtype=np.float64), y=y, columns=np.array(X.columns, dtype=str), train_idx=train_idx, test_idx=test_idx, fold_of=fold_of)
+    return X.astype(np.float64), y, train_idx, test_idx, fold_of, data_hash, False
+
+def cv_splits(fold_of: np.ndarray):
+    rows = np.arange(len(fold_of))
+    return [(rows[fold_of != k], rows[fold_of == k]) for k in range(int(fold_of.max()) + 1)]
+
+# --------------------------------------------------
+# MODELS
+# --------------------------------------------------
+def search_spaces(seed: int = SEED) -> dict:
+    # name -> (estimator, parameter grid), the grids tuned in the notebook
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler
+
+    return {
+        "logistic_regression": (
+            Pipeline(steps=[
+                ("scaler", MinMaxScaler()),
+                ("clf", LogisticRegression(class_weight="balanced", max_iter=1000, random_state=seed)),
+            ]),
+            {"clf__C": [1.0, 0.5, 0.25, 0.1]},
+        ),
+        "random_forest": (
+            RandomForestClassifier(n_estimators=300, class_weight="balanced", random_state=seed, n_jobs=-1),
+            {"max_depth": [3, 4, 5], "min_samples_leaf": [10, 20, 50], "max_features": ["sqrt", 0.5]},
+        ),
+        "gradient_boosting": (
+            GradientBoostingClassifier(random_state=seed),
+            {"n_estimators": [50, 100, 150], "learning_rate": [0.1, 0.05, 0.02], "max_depth": [2, 3], "subsample": [0.7, 0.8, 1.0]},
+        ),
+    }
+
+def _serial(estimator):
+    # The search parallelises over candidates and folds; a forest fitting its trees on
+    # every core inside each of those jobs would only oversubscribe
+    if "n_jobs" in estimator.get_params():
+        return estimator.set_params(n_jobs=1)
+    return estimator
+
+def search(name, estimator, grid, X, y, splits, jobs):
+    # Returns (best params, mean CV average precision)
+    from sklearn.base import clone
+    from sklearn.model_selection import GridSearchCV
+
+    search = GridSearchCV(_serial(clone(estimator)), grid, cv=splits, scoring="average_precision", n_jobs=jobs, refit=False)
+    search.fit(X, y)
+    return search.best_params_, float(search.best_score_)
+
+def cross_validate(estimator, params, X, y, splits, jobs) -> float:
+    from sklearn.base import clone
+    from sklearn.model_selection import cross_val_score
+
+    model = _serial(clone(estimator).set_params(**params))
+    return float(cross_val_score(model, X, y, cv=splits, scoring="average_precision", n_jobs=jobs).mean())
+
+def warm_estimator(name, estimator, params, previous_dir, feature_columns):
+    # Logistic regression restarts from the previous version's coefficients when the
+    # encoded columns are unchanged; the tree models are refitted with its parameters
+    from sklearn.base import clone
+
+    model = clone(estimator).set_params(**params)
+    if name != "logistic_regression" or previous_dir is None:
+        return model
+    previous_columns = list(joblib.load(os.path.join(previous_dir, FEATURE_COLUMNS_FILE)))
+    if previous_columns != list(feature_columns):
+        return model
+    previous = joblib.load(os.path.join(previous_dir, MODEL_FILES[name]))
+    clf = model.named_steps["clf"]
+    clf.set_params(warm_start=True)
+    clf.coef_ = previous.named_steps["clf"].coef_.copy()
+    clf.intercept_ = previous.named_steps["clf"].intercept_.copy()
+    return model
+
+# --------------------------------------------------
+# EVALUATION
+# --------------------------------------------------
+def holdout_metrics(y_true: np.ndarray, probs: np.ndarray, threshold: float = 0.5) -> dict:
+    from sklearn.metrics import accuracy_score, average_precision_score, precision_score, recall_score, roc_auc_score
+
+    y_pred = (probs >= threshold).astype(int)
+    return {
+        "roc_auc": round(float(roc_auc_score(y_true, probs)), 4),
+        "average_precision": round(float(average_precision_score(y_true, probs)), 4),
+        "accuracy": round(float(accuracy_score(y_true, y_pred)), 4),
+        "precision": round(float(precision_score(y_true, y_pred, zero_division=0)), 4),
+        "recall": round(float(recall_score(y_true, y_pred)), 4),
+    }
+
+# --------------------------------------------------
+# PIPELINE
+# --------------------------------------------------
+def train(data_path: str, out_root: str, cache_dir: str, jobs: int = -1, warm_start: str = None, seed: int = SEED):
+    timings = {}
+    start = time.perf_counter()
+    X, y, train_idx, test_idx, fold_of, data_hash, cached = load_design(data_path, cache_dir, seed)
+    timings["design"] = time.perf_counter() - start
+    print(f"Design matrix {X.shape} ({'cached' if cached else 'encoded'}) in {timings['design']:.1f}s")
+
+    splits = cv_splits(fold_of)
+    previous_dir, previous = None, None
+    if warm_start:
+        from evaluation import resolve_model_dir
+        previous_dir = resolve_model_dir(warm_start)
+        previous = load_training_manifest(previous_dir)
+        if previous is None:
+            raise ValueError(f"No {TRAINING_MANIFEST} in {previous_dir}")
+
+    models, model_specs, holdout = {}, {}, {}
+    for name, (estimator, grid) in search_spaces(seed).items():
+        start = time.perf_counter()
+        if previous is not None and name in previous["models"]:
+            # Warm start: keep the tuned parameters and only re-check them by CV
+            params = previous["models"][name]["params"]
+            cv_score = cross_validate(estimator, params, X, y, splits, jobs)
+            source = "warm_start"
+        else:
+            params, cv_score = search(name, estimator, grid, X, y, splits, jobs)
+            source = "grid_search"
+        model = warm_estimator(name, estimator, params, previous_dir, X.columns)
+        # Fitted on the training split, like the notebook's saved models
+        model.fit(X.iloc[train_idx], y[train_idx])
+        probs = model.predict_proba(X.iloc[test_idx])[:, 1]
+        holdout[name] = probs
+        models[name] = model
+        timings[name] = time.perf_counter() - start
+        model_specs[name] = {
+            "file": MODEL_FILES[name], "params": params, "params_from": source,
+            "cv_average_precision": round(cv_score, 4), "holdout": holdout_metrics(y[test_idx], probs),
+        }
+        print(f"{name:<20} {source:<11} CV AP {cv_score:.3f}  holdout AUC {model_specs[name]['holdout']['roc_auc']:.3f}  {timings[name]:.1f}s  {params}")
+
+    ensemble = np.mean([holdout[name] for name in models], axis=0)
+    metrics = {
+        "ensemble": holdout_metrics(y[test_idx], ensemble, RISK_THRESHOLD),
+        "ensemble_threshold": RISK_THRESHOLD,
+        "ensemble_threshold_sweep": {str(t): holdout_metrics(y[test_idx], ensemble, t) for t in SWEEP_THRESHOLDS},
+    }
+    return write_version(out_root, models, X.columns, model_specs, metrics, {
+        "data_path": os.path.abspath(data_path), "data_hash": data_hash, "rows": int(len(y)),
+        "holdout_rows": int(len(test_idx)), "cv_folds": int(fold_of.max()) + 1, "seed": seed,
+        "warm_started_from": previous["version"] if previous else None,
+        "timings_s": {k: round(v, 2) for k, v in timings.items()},
+    })
+
+def write_version(out_root: str, models: dict, feature_columns, model_specs: dict, metrics: dict, info: dict) -> str:
+    # Artifacts use the file names the API expects; the version directory appears
+    # only once complete (written under a temporary name, then renamed)
+    import sklearn
+
+    version = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{info['data_hash'][:8]}"
+    final_dir = os.path.join(out_root, version)
+    tmp_dir = f"{final_dir}.tmp"
+    os.makedirs(tmp_dir)
+    try:
+        for name, model in models.items():
+            joblib.dump(model, os.path.join(tmp_dir, MODEL_FILES[name]))
+        joblib.dump(feature_columns, os.path.join(tmp_dir, FEATURE_COLUMNS_FILE))
+        manifest = {
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "sklearn_version": sklearn.__version__,
+            "artifacts_hash": file_hash([os.path.join(tmp_dir, f) for f in ARTIFACT_FILES]),
+            "feature_columns": list(feature_columns),
+            "models": model_specs,
+            "metrics": metrics,
+            **info,
+        }
+        with open(os.path.join(tmp_dir, TRAINING_MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2, default=float)
+        os.rename(tmp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return final_dir
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python train.py                                   # full grid search
+    #   python train.py --warm-start model_versions       # new extract, reuse the latest version's parameters
+    # then serve a version with MODEL_DIR=model_versions (newest) or MODEL_DIR=model_versions/<version>
+    parser = argparse.ArgumentParser(description="Train the attrition models and write a versioned artifact set")
+    parser.add_argument("--data", default="WA_Fn-UseC_-HR-Employee-Attrition.csv")
+    parser.add_argument("--out", default="model_versions", help="directory that receives one subdirectory per version")
+    parser.add_argument("--cache-dir", default=".train_cache", help="encoded design matrices and CV folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits for search and CV (-1 = all cores)")
+    parser.add_argument("--warm-start", help="previous version (or the directory holding versions) to start from")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    version_dir = train(args.data, args.out, args.cache_dir, args.jobs, args.warm_start, args.seed)
+    print(f"Wrote {version_dir} in {time.perf_counter() - start:.1f}s")